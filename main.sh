@@ -1,2 +1,5 @@
-python3 src/main.py
-cd public && python3 -m http.server 8888
+python3 src/main.py --watch &
+watcher=$!
+# Background jobs ignore Ctrl-C, so stop the watcher when the server exits.
+trap 'kill $watcher 2>/dev/null' EXIT
+cd docs && python3 -m http.server 8888
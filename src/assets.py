@@ -0,0 +1,183 @@
+import os
+import shutil
+from assetstore import store_file
+from manifest import file_hash, hashed_entry, load_manifest, manifest_outputs, replace_atomic, save_manifest
+
+LINK_MODES = ("copy", "hardlink", "reflink", "store")
+
+# Linux FICLONE ioctl: share extents with the source on btrfs/xfs instead of copying bytes.
+FICLONE = 0x40049409
+
+
+def list_files(source):
+    files = []
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            files.append(os.path.relpath(path, source))
+    return files
+
+
+def is_synced(source_path, destination_path, checksum=False, link_mode="copy"):
+    if not os.path.exists(destination_path):
+        return False
+    if link_mode == "hardlink" and os.path.samefile(source_path, destination_path):
+        return True
+    source_stat = os.stat(source_path)
+    destination_stat = os.stat(destination_path)
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if checksum:
+        return file_hash(source_path) == file_hash(destination_path)
+    return source_stat.st_mtime_ns == destination_stat.st_mtime_ns
+
+
+def _reflink(source_path, destination_path):
+    import fcntl
+
+    with open(source_path, 'rb') as src, open(destination_path, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source_path, destination_path)
+
+
+def _link_or_copy(source_path, tmp_path, link_mode):
+    try:
+        if link_mode == "hardlink":
+            os.link(source_path, tmp_path)
+        elif link_mode == "reflink":
+            _reflink(source_path, tmp_path)
+        else:
+            shutil.copy2(source_path, tmp_path)
+    except (OSError, ImportError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        shutil.copy2(source_path, tmp_path)
+
+
+def place_file(source_path, destination_path, link_mode="copy"):
+    # The old file is served until the new one is complete.
+    replace_atomic(destination_path, lambda tmp_path: _link_or_copy(source_path, tmp_path, link_mode))
+
+
+def prune_empty_dirs(path, stop):
+    stop = os.path.abspath(stop)
+    path = os.path.abspath(path)
+    while path != stop and path.startswith(stop) and os.path.isdir(path) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
+
+
+def asset_entry(source_path):
+    stat = os.stat(source_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def remove_asset(destination, rel_path):
+    destination_path = os.path.join(destination, rel_path)
+    if not os.path.isfile(destination_path):
+        return False
+    os.remove(destination_path)
+    print(f"Removed file: {destination_path}")
+    prune_empty_dirs(os.path.dirname(destination_path), destination)
+    return True
+
+
+def check_link_mode(link_mode, store):
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+    if link_mode == "store" and store is None:
+        raise ValueError("The store link mode needs a store directory")
+
+
+def place_from_store(store, source_path, destination_path, previous=None):
+    # Identical files share one store object; outputs are hardlinks to it.
+    entry = hashed_entry(source_path, previous)
+    object_path, _ = store_file(store, source_path, entry["hash"])
+    if os.path.exists(destination_path) and os.path.samefile(object_path, destination_path):
+        return entry, False
+    place_file(object_path, destination_path, "hardlink")
+    return entry, True
+
+
+def sync_files(source, destination, previous_assets=None, checksum=False, link_mode="copy", origin=None, store=None):
+    # With an origin, files are placed from that already-synced copy of source
+    # instead, so several outputs can hardlink one set of assets. The store
+    # link mode places them from a content-addressed store instead.
+    check_link_mode(link_mode, store)
+    previous_assets = previous_assets or {}
+    assets = {}
+    stats = {"copied": 0, "unchanged": 0, "removed": 0}
+
+    for rel_path in list_files(source):
+        source_path = os.path.join(source, rel_path)
+        if link_mode == "store":
+            destination_path = os.path.join(destination, rel_path)
+            assets[rel_path], placed = place_from_store(store, source_path, destination_path, previous_assets.get(rel_path))
+            if placed:
+                print(f"Linked file: {source_path}")
+                stats["copied"] += 1
+            else:
+                stats["unchanged"] += 1
+            continue
+        origin_path = os.path.join(origin, rel_path) if origin else source_path
+        destination_path = os.path.join(destination, rel_path)
+        if is_synced(origin_path, destination_path, checksum, link_mode):
+            stats["unchanged"] += 1
+        else:
+            place_file(origin_path, destination_path, link_mode)
+            print(f"Copied file: {origin_path}")
+            stats["copied"] += 1
+        assets[rel_path] = asset_entry(source_path)
+
+    # Only files this sync put there are ours to delete; generated pages are left alone.
+    for rel_path in previous_assets:
+        if rel_path not in assets and remove_asset(destination, rel_path):
+            stats["removed"] += 1
+
+    return assets, stats
+
+
+def remove_untracked(destination, keep):
+    # Deletes every file under destination whose relative path is not in keep.
+    removed = 0
+    for rel_path in list_files(destination):
+        if rel_path not in keep and remove_asset(destination, rel_path):
+            removed += 1
+    return removed
+
+
+def sync_static(source, destination, manifest_path, checksum=False, link_mode="copy", origin=None, store=None):
+    manifest = load_manifest(manifest_path)
+    first_sync = "assets" not in manifest
+    assets, stats = sync_files(source, destination, manifest.get("assets"), checksum, link_mode, origin, store)
+    manifest["assets"] = assets
+    if first_sync:
+        # Nothing records what is already in destination, so anything that is
+        # neither a static file nor a known output is cleared, as the old
+        # rmtree-and-copy did.
+        stats["removed"] += remove_untracked(destination, set(manifest_outputs(destination, manifest)))
+    save_manifest(manifest_path, manifest)
+    print(f"Synced {source}: {stats['copied']} copied, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    return stats
+
+
+def sync_static_changes(changed, removed, source, destination, manifest_path, link_mode="copy", origin=None, store=None):
+    check_link_mode(link_mode, store)
+    manifest = load_manifest(manifest_path)
+    assets = manifest.setdefault("assets", {})
+    for source_path in sorted(changed):
+        rel_path = os.path.relpath(source_path, source)
+        if link_mode == "store":
+            assets[rel_path], _ = place_from_store(store, source_path, os.path.join(destination, rel_path))
+            print(f"Linked file: {source_path}")
+            continue
+        origin_path = os.path.join(origin, rel_path) if origin else source_path
+        place_file(origin_path, os.path.join(destination, rel_path), link_mode)
+        print(f"Copied file: {origin_path}")
+        assets[rel_path] = asset_entry(source_path)
+    for source_path in sorted(removed):
+        rel_path = os.path.relpath(source_path, source)
+        assets.pop(rel_path, None)
+        remove_asset(destination, rel_path)
+    save_manifest(manifest_path, manifest)
@@ -0,0 +1,52 @@
+import os
+import shutil
+from functools import partial
+from manifest import replace_atomic
+
+# Static files are kept once per distinct content under <store>/ab/abcdef...
+# and hardlinked into every output that uses them.
+
+
+def store_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".assetstore"
+
+
+def object_path(store, digest):
+    return os.path.join(store, digest[:2], digest)
+
+
+def store_file(store, source_path, digest):
+    # Returns the object path and whether this call had to copy the bytes in.
+    path = object_path(store, digest)
+    if os.path.exists(path):
+        return path, False
+    replace_atomic(path, partial(shutil.copy2, source_path))
+    return path, True
+
+
+def prune_store(store, live_digests):
+    removed = 0
+    if not os.path.isdir(store):
+        return removed
+    for prefix in os.listdir(store):
+        directory = os.path.join(store, prefix)
+        for name in os.listdir(directory):
+            if name not in live_digests:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+        if not os.listdir(directory):
+            os.rmdir(directory)
+    return removed
+
+
+def dedup_stats(asset_sets):
+    # asset_sets are the hashed manifest entries of each output. Returns the
+    # distinct objects, the bytes they hold and the bytes linked beyond that.
+    total = 0
+    unique = {}
+    for assets in asset_sets:
+        for entry in assets.values():
+            total += entry["size"]
+            unique[entry["hash"]] = entry["size"]
+    stored = sum(unique.values())
+    return {"objects": len(unique), "stored": stored, "saved": total - stored}
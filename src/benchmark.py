@@ -0,0 +1,295 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from assets import sync_files
+from main import extract_title, generate_pages_recursive
+from manifest import manifest_path_for
+from template import compile_template
+from textnode import (
+    BlockType,
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    scan_blocks,
+    text_to_textnodes,
+)
+
+# Generates a synthetic site and times each build stage separately, writing
+# the results as JSON. Pass --baseline with an earlier result to see ratios.
+
+WORDS = (
+    "elf ring shire hobbit wizard river mountain forest tower road king "
+    "sword song star moon lake gate hall bridge valley stone fire"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def sentence(rng, words, links, images, page_count):
+    parts = [rng.choice(WORDS) for _ in range(words)]
+    for _ in range(links):
+        target = rng.randrange(page_count)
+        parts.insert(rng.randrange(len(parts) + 1), f"[{rng.choice(WORDS)}](/page{target})")
+    for _ in range(images):
+        parts.insert(rng.randrange(len(parts) + 1), f"![{rng.choice(WORDS)}](/images/img{rng.randrange(10)}.png)")
+    parts.insert(rng.randrange(len(parts) + 1), f"**{rng.choice(WORDS)}**")
+    parts.insert(rng.randrange(len(parts) + 1), f"_{rng.choice(WORDS)}_")
+    parts.insert(rng.randrange(len(parts) + 1), f"`{rng.choice(WORDS)}`")
+    return " ".join(parts)
+
+
+def synthetic_page(rng, index, params):
+    blocks = [f"# Page {index}"]
+    for i in range(params["paragraphs"]):
+        kind = i % 5
+        if kind == 0:
+            blocks.append(f"## {rng.choice(WORDS).title()} {i}")
+        elif kind == 1:
+            blocks.append("\n".join(
+                f"- {sentence(rng, 6, params['links'], 0, params['pages'])}" for _ in range(4)
+            ))
+        elif kind == 2:
+            blocks.append("\n".join(f"{n + 1}. {sentence(rng, 6, 0, 0, params['pages'])}" for n in range(3)))
+        elif kind == 3:
+            blocks.append(f"> {sentence(rng, 12, 0, 0, params['pages'])}")
+        else:
+            blocks.append(sentence(rng, 40, params["links"], params["images"], params["pages"]))
+    for i in range(params["code_blocks"]):
+        blocks.append("```\n" + "\n".join(f"line_{i}_{n} = {n}" for n in range(8)) + "\n```")
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_path(index, depth):
+    # Spread pages over a tree of `depth` directory levels.
+    parts = [f"section{(index >> (3 * level)) % 8}" for level in range(depth)]
+    return os.path.join(*parts, f"page{index}", "index.md")
+
+
+def generate_site(root, params):
+    rng = random.Random(params["seed"])
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    for index in range(params["pages"]):
+        path = os.path.join(content, page_path(index, params["depth"]))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(synthetic_page(rng, index, params))
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+    with open(os.path.join(static, "index.css"), 'w') as f:
+        f.write("body { font-family: serif; }\n" * 50)
+    for i in range(params["static_files"]):
+        with open(os.path.join(static, "images", f"img{i}.png"), 'wb') as f:
+            f.write(rng.randbytes(params["static_size"]))
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, 'w') as f:
+        f.write(TEMPLATE)
+    return content, static, template_path
+
+
+def inline_texts(block, block_type):
+    if block_type == BlockType.PARAGRAPH:
+        return [block.replace('\n', ' ')]
+    if block_type == BlockType.HEADING:
+        return [block.lstrip('#').strip()]
+    if block_type == BlockType.QUOTE:
+        return ['\n'.join(line.lstrip('>').strip() for line in block.split('\n'))]
+    if block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        return [line.split(' ', 1)[1] for line in block.split('\n') if ' ' in line]
+    return []
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals = {}
+
+    def run(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.totals[stage] = self.totals.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+
+def time_stages(content, static, template_path, out_dir):
+    timer = StageTimer()
+    with open(template_path) as f:
+        template = compile_template(f.read(), "/site/")
+    sources = []
+    for dirpath, _, filenames in os.walk(content):
+        sources.extend(os.path.join(dirpath, name) for name in filenames if name.endswith('.md'))
+    sources.sort()
+
+    def read(path):
+        with open(path) as f:
+            return f.read()
+
+    def write(path, html):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(html)
+
+    def classify(blocks):
+        return [block_to_block_type(block) for block in blocks]
+
+    def scan(markdown):
+        return list(scan_blocks(markdown.split('\n')))
+
+    def tokenize(blocks, types):
+        for block, block_type in zip(blocks, types):
+            for text in inline_texts(block, block_type):
+                text_to_textnodes(text)
+
+    for source in sources:
+        markdown = timer.run("read", read, source)
+        blocks = timer.run("markdown_to_blocks", markdown_to_blocks, markdown)
+        types = timer.run("block_to_block_type", classify, blocks)
+        timer.run("scan_blocks", scan, markdown)
+        timer.run("text_to_textnodes", tokenize, blocks, types)
+        node = timer.run("markdown_to_html_node", markdown_to_html_node, markdown)
+        html = timer.run("to_html", node.to_html)
+        title = extract_title(markdown)
+        page = timer.run("template_fill", template.render, {"Title": title, "Content": html})
+        dest = os.path.join(out_dir, "stages", os.path.relpath(source, content))[:-3] + ".html"
+        timer.run("write", write, dest, page)
+
+    assets_dir = os.path.join(out_dir, "assets")
+    assets, _ = timer.run("static_sync_cold", sync_files, static, assets_dir)
+    timer.run("static_sync_warm", sync_files, static, assets_dir, assets)
+    return len(sources), timer.totals
+
+
+def time_builds(content, template_path, out_dir, jobs):
+    dest = os.path.join(out_dir, "site")
+    manifest_path = manifest_path_for(dest)
+    timings = {}
+    start = time.perf_counter()
+    generate_pages_recursive(content, template_path, dest, "/site/", manifest_path, jobs)
+    timings["full_build"] = time.perf_counter() - start
+    start = time.perf_counter()
+    generate_pages_recursive(content, template_path, dest, "/site/", manifest_path, jobs)
+    timings["noop_rebuild"] = time.perf_counter() - start
+    return timings
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline):
+    ratios = {}
+    for stage, seconds in result["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if before:
+            ratios[stage] = round(seconds / before, 3)
+    return ratios
+
+
+WORK_DIRS = ("input", "output")
+
+
+def clear_work_dir(work_dir):
+    # Only what run_benchmark writes is removed, so --keep can point at a
+    # directory that holds anything else.
+    for name in WORK_DIRS:
+        path = os.path.join(work_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+def run_benchmark(params, work_dir, jobs=1):
+    content, static, template_path = generate_site(os.path.join(work_dir, "input"), params)
+    out_dir = os.path.join(work_dir, "output")
+    real_stdout = sys.stdout
+    # The build prints a line per page; keep it out of the measurement output.
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            pages, stages = time_stages(content, static, template_path, out_dir)
+            stages.update(time_builds(content, template_path, out_dir, jobs))
+        finally:
+            sys.stdout = real_stdout
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "params": params,
+        "jobs": jobs,
+        "pages": pages,
+        "stages": {stage: round(seconds, 6) for stage, seconds in stages.items()},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generator on a synthetic site.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=30, help="blocks per page")
+    parser.add_argument("--links", type=int, default=3, help="links per paragraph and list item")
+    parser.add_argument("--images", type=int, default=1, help="images per paragraph")
+    parser.add_argument("--code-blocks", type=int, default=2, help="fenced code blocks per page")
+    parser.add_argument("--depth", type=int, default=2, help="directory nesting of content/")
+    parser.add_argument("--static-files", type=int, default=20)
+    parser.add_argument("--static-size", type=int, default=65536, help="bytes per static file")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--keep", help="generate into input/ and output/ under this directory and leave them in place")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    params = {
+        "pages": args.pages,
+        "paragraphs": args.paragraphs,
+        "links": args.links,
+        "images": args.images,
+        "code_blocks": args.code_blocks,
+        "depth": args.depth,
+        "static_files": args.static_files,
+        "static_size": args.static_size,
+        "seed": args.seed,
+    }
+    if args.keep:
+        clear_work_dir(args.keep)
+        result = run_benchmark(params, args.keep, args.jobs)
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            result = run_benchmark(params, work_dir, args.jobs)
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["ratio_to_baseline"] = compare(result, json.load(f))
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
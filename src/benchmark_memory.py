@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from memory import peak_rss
+
+# Measures peak RSS while parsing one large synthetic markdown document into a
+# node tree. Run with --compare REV to measure REV's src/ against the working tree,
+# or with --site-mb to build a whole synthetic site in --max-memory mode.
+
+
+def synthetic_markdown(paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(f"## Section {i}")
+        blocks.append(
+            f"Paragraph {i} has **bold {i}**, _italic {i}_, `code {i}`, "
+            f"a [link {i}](/pages/{i}) and an ![image {i}](/images/{i}.png) in it."
+        )
+        blocks.append("\n".join(f"- item {i}.{j} with [ref](/r/{j})" for j in range(5)))
+        blocks.append("> quoted _line_ one\n> quoted line **two**")
+    return "\n\n".join(blocks)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        count += 1
+        if item.tag is not None and item.value is None:
+            stack.extend(item.children)
+    return count
+
+
+def measure(paragraphs):
+    from textnode import markdown_to_html_node
+
+    markdown = synthetic_markdown(paragraphs)
+    before_kb = peak_rss() // 1024
+    start = time.perf_counter()
+    tree = markdown_to_html_node(markdown)
+    elapsed = time.perf_counter() - start
+    peak_kb = peak_rss() // 1024
+    return {
+        "paragraphs": paragraphs,
+        "nodes": count_nodes(tree),
+        "parse_seconds": round(elapsed, 4),
+        "rss_before_kb": before_kb,
+        "peak_rss_kb": peak_kb,
+        "tree_rss_kb": peak_kb - before_kb,
+    }
+
+
+def write_synthetic_site(root, site_mb, page_mb):
+    # Pages of about page_mb MB each until the content reaches site_mb MB,
+    # written one page at a time.
+    content = os.path.join(root, "content")
+    paragraphs = max(1, int(page_mb * 1024 * 1024 / len(synthetic_markdown(1))))
+    written = 0
+    page = 0
+    while written < site_mb * 1024 * 1024:
+        path = os.path.join(content, f"section{page % 10}", f"page{page}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            written += f.write(f"# Page {page}\n\n")
+            written += f.write(synthetic_markdown(paragraphs))
+        page += 1
+    template_path = os.path.join(root, "template.html")
+    with open(template_path, 'w') as f:
+        f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+    return content, template_path, page
+
+
+def measure_site(site_mb, page_mb, max_memory, jobs=1):
+    from main import BuildOptions, generate_targets
+
+    with tempfile.TemporaryDirectory() as root:
+        content, template_path, pages = write_synthetic_site(root, site_mb, page_mb)
+        targets = [("/", os.path.join(root, "docs"), os.path.join(root, "docs.manifest.json"))]
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                results = generate_targets(content, template_path, targets, BuildOptions(jobs=jobs, max_memory=max_memory))
+            finally:
+                sys.stdout = stdout
+        elapsed = time.perf_counter() - start
+    return {
+        "site_mb": site_mb,
+        "pages": pages,
+        "max_memory_mb": max_memory,
+        "build_seconds": round(elapsed, 2),
+        "failed": sum(1 for result in results if result["error"] is not None),
+        "peak_rss_kb": peak_rss() // 1024,
+    }
+
+
+def run_isolated(src_dir, paragraphs):
+    # A fresh interpreter per measurement so the peak isn't shared between runs.
+    command = [sys.executable, os.path.abspath(__file__), "--src", src_dir, "--paragraphs", str(paragraphs)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def export_src(revision, destination):
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    archive = subprocess.run(
+        ["git", "-C", repo_root, "archive", "--format=tar", revision, "src"],
+        check=True,
+        capture_output=True,
+    ).stdout
+    archive_path = os.path.join(destination, "src.tar")
+    with open(archive_path, 'wb') as f:
+        f.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(destination)
+    return os.path.join(destination, "src")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peak RSS of parsing a large synthetic document.")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--src", help="import the generator from this directory")
+    parser.add_argument("--compare", metavar="REV", help="also measure the src/ of this git revision")
+    parser.add_argument("--site-mb", type=float, help="build a synthetic site of this many MB instead")
+    parser.add_argument("--page-mb", type=float, default=4, help="size of each synthetic page with --site-mb")
+    parser.add_argument("--max-memory", type=int, default=128, metavar="MB", help="memory budget for the --site-mb build")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.site_mb:
+        if args.src:
+            sys.path.insert(0, os.path.abspath(args.src))
+        result = measure_site(args.site_mb, args.page_mb, args.max_memory, args.jobs)
+    elif args.compare:
+        current_src = os.path.dirname(os.path.abspath(__file__))
+        with tempfile.TemporaryDirectory() as tmp:
+            before = run_isolated(export_src(args.compare, tmp), args.paragraphs)
+        after = run_isolated(current_src, args.paragraphs)
+        result = {
+            "before": before,
+            "after": after,
+            "tree_rss_ratio": round(after["tree_rss_kb"] / max(before["tree_rss_kb"], 1), 3),
+        }
+    else:
+        if args.src:
+            sys.path.insert(0, os.path.abspath(args.src))
+        result = measure(args.paragraphs)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+# Bump when block rendering changes so stale fragments are never served.
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_open_caches = {}
+
+
+def cache_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".blockcache.sqlite"
+
+
+class BlockCache:
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self.connection = sqlite3.connect(path, timeout=60)
+        # WAL lets worker processes read while another one writes.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks "
+            "(key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS blocks_last_used ON blocks (last_used)")
+        self.connection.commit()
+
+    @staticmethod
+    def key(block, block_type, basepath="/", asset_digest=None, minify=False):
+        # Fragments are stored with their URLs already resolved against the
+        # basepath and asset map, and minified if asked to be.
+        resolution = basepath if asset_digest is None else f"{basepath}\0{asset_digest}"
+        if minify:
+            resolution += "\0minify"
+        digest = hashlib.sha256(f"{CACHE_VERSION}\0{resolution}\0{block_type.value}\0{block}".encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        row = self.connection.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time_ns()
+        return row[0]
+
+    def put(self, key, html):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO blocks (key, html, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, html, len(html.encode()), time.time_ns()),
+        )
+
+    def commit(self):
+        # Recency of hits is recorded in one batch rather than a write per lookup.
+        if self._touched:
+            self.connection.executemany(
+                "UPDATE blocks SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            self._touched = {}
+        self.connection.commit()
+
+    def total_bytes(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+
+    def evict(self, max_bytes=DEFAULT_MAX_BYTES):
+        # Least recently used blocks go first until the cache fits in max_bytes.
+        self.commit()
+        excess = self.total_bytes() - max_bytes
+        if excess <= 0:
+            return 0
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM blocks ORDER BY last_used"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self.connection.executemany("DELETE FROM blocks WHERE key = ?", evicted)
+        self.connection.commit()
+        return len(evicted)
+
+    def stats(self):
+        entries = self.connection.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self.total_bytes()}
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+
+def open_block_cache(path):
+    # One connection per process and path; forked workers open their own.
+    key = (os.getpid(), os.path.abspath(path))
+    cache = _open_caches.get(key)
+    if cache is None:
+        cache = BlockCache(path)
+        _open_caches[key] = cache
+    return cache
+
+
+def close_block_cache(path):
+    cache = _open_caches.pop((os.getpid(), os.path.abspath(path)), None)
+    if cache is not None:
+        cache.close()
+
+
+def format_stats(hits, misses, stats):
+    lookups = hits + misses
+    rate = 100 * hits / lookups if lookups else 0
+    return (
+        f"Block cache: {hits} hits, {misses} misses ({rate:.1f}% hit rate), "
+        f"{stats['entries']} entries, {stats['bytes']} bytes"
+    )
@@ -0,0 +1,88 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from assets import list_files
+from manifest import hashed_entry, load_manifest, save_manifest, write_atomic
+
+# Writes foo.html.gz beside foo.html so a static host can serve it as-is.
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt", ".map")
+DEFAULT_MIN_SIZE = 1024
+GZIP_SUFFIX = ".gz"
+
+
+def is_compressible(path, min_size=DEFAULT_MIN_SIZE):
+    return path.endswith(COMPRESSIBLE_EXTENSIONS) and os.path.getsize(path) >= min_size
+
+
+def gzip_file(path):
+    # mtime=0 and no stored filename keep the sidecar identical for identical input.
+    def write(raw):
+        with open(path, 'rb') as src:
+            with gzip.GzipFile(filename="", mode='wb', compresslevel=9, fileobj=raw, mtime=0) as dst:
+                for chunk in iter(lambda: src.read(65536), b''):
+                    dst.write(chunk)
+    write_atomic(path + GZIP_SUFFIX, write, 'wb')
+    return os.path.getsize(path), os.path.getsize(path + GZIP_SUFFIX)
+
+
+def remove_compressed(dest_dir, manifest_path):
+    # For builds without --gzip: sidecars an earlier build wrote would go on
+    # being served in place of the pages they no longer match.
+    manifest = load_manifest(manifest_path)
+    if "compressed" not in manifest:
+        return 0
+    removed = 0
+    for rel_path in manifest.pop("compressed"):
+        sidecar = os.path.join(dest_dir, rel_path + GZIP_SUFFIX)
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+            removed += 1
+    save_manifest(manifest_path, manifest)
+    print(f"Removed {removed} compressed file(s)")
+    return removed
+
+
+def compress_outputs(dest_dir, manifest_path, jobs=1, min_size=DEFAULT_MIN_SIZE):
+    manifest = load_manifest(manifest_path)
+    previous = manifest.get("compressed") or {}
+    candidates = [
+        rel_path for rel_path in list_files(dest_dir)
+        if is_compressible(os.path.join(dest_dir, rel_path), min_size)
+    ]
+
+    def check(rel_path):
+        path = os.path.join(dest_dir, rel_path)
+        old = previous.get(rel_path)
+        entry = hashed_entry(path, old)
+        if old is not None and old["hash"] == entry["hash"] and os.path.exists(path + GZIP_SUFFIX):
+            return rel_path, entry, None
+        return rel_path, entry, gzip_file(path)
+
+    # zlib releases the GIL, so threads compress in parallel without pickling.
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        results = list(executor.map(check, candidates))
+
+    compressed = {}
+    stats = {"compressed": 0, "unchanged": 0, "removed": 0, "bytes_in": 0, "bytes_out": 0}
+    for rel_path, entry, sizes in results:
+        compressed[rel_path] = entry
+        if sizes is None:
+            stats["unchanged"] += 1
+        else:
+            stats["compressed"] += 1
+            stats["bytes_in"] += sizes[0]
+            stats["bytes_out"] += sizes[1]
+    for rel_path in previous:
+        sidecar = os.path.join(dest_dir, rel_path + GZIP_SUFFIX)
+        if rel_path not in compressed and os.path.exists(sidecar):
+            os.remove(sidecar)
+            stats["removed"] += 1
+
+    manifest["compressed"] = compressed
+    save_manifest(manifest_path, manifest)
+    message = f"Compressed {stats['compressed']} file(s), {stats['unchanged']} unchanged, {stats['removed']} removed"
+    if stats["bytes_in"]:
+        message += f" ({stats['bytes_in']} -> {stats['bytes_out']} bytes)"
+    print(message)
+    return stats
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+from assets import place_file, prune_empty_dirs
+from manifest import file_hash, save_json_state
+
+# Static files keep their plain names and also get a content-hashed one
+# (index.css -> index.3f2a9c1e.css) that can be cached forever. Pages and the
+# template are pointed at the hashed names through the URL resolver.
+
+FINGERPRINT_LENGTH = 8
+ASSET_MANIFEST = "asset-manifest.json"
+
+
+def fingerprinted_path(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def asset_url(rel_path):
+    return "/" + rel_path.replace(os.sep, "/")
+
+
+def remove_fingerprinted(dest_dir, rel_path):
+    path = os.path.join(dest_dir, rel_path)
+    if os.path.exists(path):
+        os.remove(path)
+        print(f"Removed file: {path}")
+        prune_empty_dirs(os.path.dirname(path), dest_dir)
+
+
+def fingerprint_assets(dest_dir, assets, previous=None):
+    # assets are the manifest entries of the static files synced into
+    # dest_dir. Only files whose size or mtime moved since previous are hashed
+    # again; the hashed name is a hardlink to the synced copy.
+    previous = previous or {}
+    fingerprints = {}
+    stats = {"hashed": 0, "unchanged": 0, "removed": 0}
+    for rel_path in sorted(assets):
+        path = os.path.join(dest_dir, rel_path)
+        stat = os.stat(path)
+        entry = previous.get(rel_path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            stats["unchanged"] += 1
+        else:
+            digest = file_hash(path)
+            entry = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns, "output": fingerprinted_path(rel_path, digest)}
+            stats["hashed"] += 1
+        output = os.path.join(dest_dir, entry["output"])
+        if not os.path.exists(output):
+            place_file(path, output, "hardlink")
+        fingerprints[rel_path] = entry
+
+    for rel_path, entry in previous.items():
+        current = fingerprints.get(rel_path)
+        if current is None or current["output"] != entry["output"]:
+            remove_fingerprinted(dest_dir, entry["output"])
+            stats["removed"] += 1
+    return fingerprints, stats
+
+
+def asset_map(fingerprints):
+    # A sorted tuple of (url, fingerprinted url) pairs: hashable, so it can key
+    # the template cache, and cheap to send to worker processes.
+    return tuple(sorted((asset_url(rel_path), asset_url(entry["output"])) for rel_path, entry in fingerprints.items()))
+
+
+def asset_map_digest(assets):
+    if not assets:
+        return None
+    return hashlib.sha256(json.dumps(assets).encode()).hexdigest()
+
+
+def write_asset_manifest(dest_dir, assets):
+    save_json_state(os.path.join(dest_dir, ASSET_MANIFEST), dict(assets), indent=2)
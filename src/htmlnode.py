@@ -1,40 +1,120 @@
+import re
+from types import MappingProxyType
+
+URL_PROPS = ("href", "src")
+# Elements whose text is shown as written, so minifying leaves them byte-exact.
+PRESERVE_WHITESPACE = ("pre", "code", "textarea", "script", "style")
+WHITESPACE = re.compile(r"\s+")
+
+
+def url_resolver(basepath, assets=None):
+    # Root-relative URLs get the basepath; absolute and protocol-relative URLs
+    # are left alone. assets maps asset URLs to their fingerprinted names.
+    # Returns None when there is nothing to rewrite.
+    if basepath == "/" and not assets:
+        return None
+    assets = dict(assets or ())
+
+    def resolve(url):
+        url = assets.get(url, url)
+        if basepath != "/" and url.startswith("/") and not url.startswith("//"):
+            return basepath + url[1:]
+        return url
+
+    return resolve
+
+
+class _NoChildren(list):
+    # What a node without children reads as: an empty list, as before, that
+    # refuses changes since they would not be stored on the node.
+    def _refuse(self, *args, **kwargs):
+        raise TypeError("This node has no children list to change; assign node.children instead")
+
+    append = extend = insert = pop = remove = clear = sort = reverse = _refuse
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _refuse
+
+
+NO_CHILDREN = _NoChildren()
+
+
 class HTMLNode:
+    # Pages build hundreds of thousands of nodes, so each one is a fixed set of
+    # slots: props are kept as a tuple of pairs, and an absent children list or
+    # props mapping is stored as None instead of a fresh empty container.
+    # Reading props gives a read-only view, and reading absent children an
+    # empty list that cannot be changed, so changing them in place fails
+    # instead of being lost; assign a new dict or list instead.
+    __slots__ = ("tag", "value", "_children", "_props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
-        self.children = children if children is not None else []
-        self.props = props if props is not None else {}
+        self.children = children
+        self.props = props
 
-    def to_html(self):
+    @property
+    def children(self):
+        return self._children if self._children is not None else NO_CHILDREN
+
+    @children.setter
+    def children(self, children):
+        self._children = children if children else None
+
+    @property
+    def props(self):
+        return MappingProxyType(dict(self._props) if self._props is not None else {})
+
+    @props.setter
+    def props(self, props):
+        self._props = tuple(props.items()) if props else None
+
+    def to_html(self, resolve_url=None, minify=False):
         raise NotImplementedError("Subclasses should implement this method.")
 
-    def props_to_html(self):
-        if not self.props:
+    def iter_html(self, resolve_url=None, minify=False):
+        yield self.to_html(resolve_url, minify)
+
+    def write_html(self, stream, resolve_url=None, minify=False):
+        stream.writelines(self.iter_html(resolve_url, minify))
+
+    def props_to_html(self, resolve_url=None):
+        if self._props is None:
             return ""
-        return " " + " ".join(f'{key}="{value}"' for key, value in self.props.items())
+        if resolve_url is None:
+            return " " + " ".join(f'{key}="{value}"' for key, value in self._props)
+        return " " + " ".join(
+            f'{key}="{resolve_url(value) if key in URL_PROPS else value}"' for key, value in self._props
+        )
 
     def __repr__(self):
         return (
             f"HTMLNode(tag={self.tag!r}, value={self.value!r}, "
-            f"children={self.children!r}, props={self.props!r})"
+            f"children={list(self.children)!r}, props={dict(self.props)!r})"
         )
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         if value is None:
             raise ValueError("LeafNode requires a value.")
         super().__init__(tag=tag, value=value, children=None, props=props)
 
-    def to_html(self):
+    def to_html(self, resolve_url=None, minify=False):
         if self.value is None:
             raise ValueError("LeafNode requires a value.")
+        value = str(self.value)
+        if minify and self.tag not in PRESERVE_WHITESPACE:
+            value = WHITESPACE.sub(" ", value)
         if self.tag is None:
-            return str(self.value)
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        return f"<{self.tag}{self.props_to_html(resolve_url)}>{value}</{self.tag}>"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         if tag is None:
             raise ValueError("ParentNode requires a tag.")
@@ -42,11 +122,32 @@ class ParentNode(HTMLNode):
             raise ValueError("ParentNode requires at least one child.")
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
-        if self.tag is None:
-            raise ValueError("ParentNode requires a tag.")
-        if self.children is None or len(self.children) == 0:
-            raise ValueError("ParentNode requires at least one child.")
-        children_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+    def to_html(self, resolve_url=None, minify=False):
+        return "".join(self.iter_html(resolve_url, minify))
+
+    def iter_html(self, resolve_url=None, minify=False):
+        # Explicit stack instead of recursion: deep trees can't hit the recursion
+        # limit, and each fragment is produced once rather than re-joined per level.
+        # Strings are already-serialized HTML (closing tags, cached fragments)
+        # and are emitted as they are.
+        if minify and self.tag in PRESERVE_WHITESPACE:
+            minify = False
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, ParentNode):
+                if item.tag is None:
+                    raise ValueError("ParentNode requires a tag.")
+                if item._children is None:
+                    raise ValueError("ParentNode requires at least one child.")
+                if minify and item is not self and item.tag in PRESERVE_WHITESPACE:
+                    yield from item.iter_html(resolve_url)
+                    continue
+                yield f"<{item.tag}{item.props_to_html(resolve_url)}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item._children))
+            else:
+                yield item.to_html(resolve_url, minify)
 
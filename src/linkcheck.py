@@ -0,0 +1,157 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+from htmlnode import URL_PROPS
+from manifest import load_json_state, save_json_state
+from metadata import parse_front_matter
+from template import URL_ATTRIBUTE
+from textnode import BlockType, block_to_html_node, scan_blocks
+
+# The internal link graph: every LINK and IMAGE URL of every page, checked
+# against a set of the files the build produced. Nothing is fetched or crawled.
+
+LINKS_VERSION = 1
+EXTERNAL_URL = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)")
+
+
+def state_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".links.json"
+
+
+def new_state():
+    return {"version": LINKS_VERSION, "outputs": [], "pages": {}}
+
+
+def load_state(path):
+    return load_json_state(path, LINKS_VERSION, new_state)
+
+
+def save_state(path, state):
+    save_json_state(path, state)
+
+
+def url_unresolver(basepath, assets=None):
+    # The inverse of htmlnode.url_resolver, for URLs read back out of HTML
+    # that was serialized for basepath.
+    originals = {hashed: url for url, hashed in assets or ()}
+
+    def unresolve(url):
+        if basepath != "/" and url.startswith(basepath):
+            url = "/" + url[len(basepath):]
+        return originals.get(url, url)
+
+    return unresolve
+
+
+def page_links(tree, basepath="/", assets=None):
+    # href/src values as written in the markdown. Cached blocks are already
+    # serialized with their URLs resolved, so those are mapped back.
+    unresolve = url_unresolver(basepath, assets)
+    links = []
+    stack = [tree]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            links.extend(unresolve(match.group(2)) for match in URL_ATTRIBUTE.finditer(item))
+            continue
+        links.extend(value for key, value in item.props.items() if key in URL_PROPS)
+        stack.extend(reversed(item.children))
+    return links
+
+
+def source_links(source):
+    # For pages the build did not render this time.
+    with open(source, 'r') as f:
+        _, body = parse_front_matter(f)
+        return [
+            url
+            for block, block_type in scan_blocks(body)
+            if block_type != BlockType.CODE
+            for url in page_links(block_to_html_node(block, block_type))
+        ]
+
+
+def link_key(url, page_url):
+    # Site-relative path a link points at, without leading or trailing
+    # slashes; None for external, mailto: and same-page links.
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if not url or EXTERNAL_URL.match(url):
+        return None
+    if not url.startswith("/"):
+        url = posixpath.join(posixpath.dirname(page_url), url)
+    return posixpath.normpath(unquote(url)).strip("/")
+
+
+def output_keys(paths):
+    # Every key a file answers to: foo/index.html also serves foo/ and foo.
+    keys = set()
+    for rel_path in paths:
+        rel_path = rel_path.replace(os.sep, "/")
+        keys.add(rel_path)
+        if rel_path == "index.html":
+            keys.add("")
+        elif rel_path.endswith("/index.html"):
+            keys.add(rel_path[:-len("/index.html")])
+    return keys
+
+
+def broken_links(page, outputs):
+    broken = []
+    for url in page["links"]:
+        key = link_key(url, page["url"])
+        if key is not None and key not in outputs:
+            broken.append(url)
+    return broken
+
+
+def update_graph(state, index, dir_path_content, outputs, rendered=None):
+    # rendered maps content-relative paths to links taken from trees the
+    # build already had; other pages are re-read only when their size or mtime
+    # moved. Only those pages are re-checked, plus pages linking to an output
+    # that appeared or disappeared. Returns the re-checked pages.
+    rendered = rendered or {}
+    old_pages = state["pages"]
+    pages = {}
+    checked = set()
+    for rel_path, entry in sorted(index["pages"].items()):
+        previous = old_pages.get(rel_path)
+        if rel_path not in rendered and previous is not None and previous["size"] == entry["size"] and previous["mtime"] == entry["mtime"]:
+            pages[rel_path] = previous
+            continue
+        if rel_path in rendered:
+            links = rendered[rel_path]
+        else:
+            links = source_links(os.path.join(dir_path_content, rel_path))
+        pages[rel_path] = {
+            "size": entry["size"],
+            "mtime": entry["mtime"],
+            "url": entry["url"],
+            "draft": entry["meta"]["draft"],
+            "links": links,
+        }
+        checked.add(rel_path)
+
+    moved = outputs.symmetric_difference(state["outputs"])
+    if moved:
+        for rel_path, page in pages.items():
+            if rel_path not in checked and any(link_key(url, page["url"]) in moved for url in page["links"]):
+                checked.add(rel_path)
+    for rel_path in checked:
+        pages[rel_path]["broken"] = broken_links(pages[rel_path], outputs)
+    state["pages"] = pages
+    state["outputs"] = sorted(outputs)
+    return checked
+
+
+def orphan_pages(state, listed=()):
+    # Published pages other than the home page that no other page, and no
+    # generated listing, links to.
+    inbound = set(listed)
+    for page in state["pages"].values():
+        own = link_key(page["url"], "/")
+        inbound.update(key for key in (link_key(url, page["url"]) for url in page["links"]) if key != own)
+    return sorted(
+        rel_path for rel_path, page in state["pages"].items()
+        if not page["draft"] and page["url"] != "/" and link_key(page["url"], "/") not in inbound
+    )
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import re
+from xml.sax.saxutils import escape, quoteattr
+from htmlnode import LeafNode, ParentNode
+from metadata import all_tags, pages_by_date, pages_with_tag, published
+
+# Pages derived from the metadata index rather than from markdown: paginated
+# section listings, tag pages, an Atom feed and a sitemap. Builders here
+# return (url, title, node) or XML text; main.py writes them out.
+
+POSTS_PER_PAGE = 10
+FEED_ENTRIES = 20
+FEED_PATH = "feed.xml"
+SITEMAP_PATH = "sitemap.xml"
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "tag"
+
+
+def tag_slugs(tags):
+    # Tags that slugify alike (C++ and C#) get -2, -3, ... in tag order, so no
+    # tag page overwrites another.
+    slugs = {}
+    taken = set()
+    for tag in sorted(tags):
+        base = slug = slugify(tag)
+        suffix = 1
+        while slug in taken:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        taken.add(slug)
+        slugs[tag] = slug
+    return slugs
+
+
+def output_for_url(url):
+    # /blog/page/2 is written to blog/page/2/index.html.
+    path = url.strip("/")
+    return f"{path}/index.html" if path else "index.html"
+
+
+def section_pages(index, section):
+    # Dated pages newest first, then undated ones by title. The section's own
+    # index page is not one of its posts; no section means the whole site.
+    section_url = "/" + section.strip("/") if section is not None else None
+    dated = [entry for _, entry in pages_by_date(index, section) if entry["url"] != section_url]
+    undated = [
+        entry for _, entry in published(index, section)
+        if not entry["meta"]["date"] and entry["url"] != section_url
+    ]
+    undated.sort(key=lambda entry: (entry["meta"]["title"] or "", entry["url"]))
+    return dated + undated
+
+
+def paginate(entries, per_page):
+    return [entries[start:start + per_page] for start in range(0, len(entries), per_page)] or [[]]
+
+
+def page_link(base_url, number):
+    return base_url if number == 1 else f"{base_url.rstrip('/')}/page/{number}"
+
+
+def listing_node(entries, base_url, number, page_count):
+    items = []
+    for entry in entries:
+        children = [LeafNode("a", entry["meta"]["title"] or entry["url"], {"href": entry["url"]})]
+        if entry["meta"]["date"]:
+            children.append(LeafNode(None, " "))
+            children.append(LeafNode("time", entry["meta"]["date"], {"datetime": entry["meta"]["date"]}))
+        items.append(ParentNode("li", children))
+    children = [ParentNode("ul", items, {"class": "post-list"}) if items else LeafNode("p", "Nothing here yet.")]
+    links = []
+    if number > 1:
+        links.append(LeafNode("a", "Newer", {"href": page_link(base_url, number - 1), "rel": "prev"}))
+    if number < page_count:
+        links.append(LeafNode("a", "Older", {"href": page_link(base_url, number + 1), "rel": "next"}))
+    if links:
+        children.append(ParentNode("nav", links, {"class": "pagination"}))
+    return ParentNode("div", children)
+
+
+def paginated_pages(entries, base_url, title, per_page):
+    chunks = paginate(entries, per_page)
+    pages = []
+    for number, chunk in enumerate(chunks, 1):
+        page_title = title if number == 1 else f"{title}, page {number}"
+        pages.append((page_link(base_url, number), page_title, listing_node(chunk, base_url, number, len(chunks))))
+    return pages
+
+
+def tag_pages(index, per_page):
+    pages = []
+    tags = all_tags(index)
+    if not tags:
+        return pages
+    slugs = tag_slugs(tags)
+    items = [
+        ParentNode("li", [LeafNode("a", tag, {"href": f"/tags/{slugs[tag]}"}), LeafNode(None, f" ({count})")])
+        for tag, count in tags.items()
+    ]
+    pages.append(("/tags", "Tags", ParentNode("div", [ParentNode("ul", items, {"class": "tag-list"})])))
+    for tag in tags:
+        entries = [entry for _, entry in pages_with_tag(index, tag)]
+        ordered = sorted(entries, key=lambda entry: (entry["meta"]["date"] or "", entry["url"]), reverse=True)
+        pages.extend(paginated_pages(ordered, f"/tags/{slugs[tag]}", f"Tagged {tag}", per_page))
+    return pages
+
+
+def collection_pages(index, section=None, per_page=POSTS_PER_PAGE):
+    pages = []
+    if section is not None:
+        title = section.strip("/").replace("-", " ").title()
+        pages += paginated_pages(section_pages(index, section), "/" + section.strip("/"), title, per_page)
+    return pages + tag_pages(index, per_page)
+
+
+def absolute_url(site_url, basepath, url):
+    return site_url.rstrip("/") + basepath + url.lstrip("/")
+
+
+def site_title(index):
+    entry = index["pages"].get("index.md")
+    return entry["meta"]["title"] if entry and entry["meta"]["title"] else "Feed"
+
+
+def atom_feed(index, section, site_url, basepath="/", limit=FEED_ENTRIES):
+    entries = [entry for entry in section_pages(index, section) if entry["meta"]["date"]][:limit]
+    updated = f"{entries[0]['meta']['date']}T00:00:00Z" if entries else "1970-01-01T00:00:00Z"
+    home = absolute_url(site_url, basepath, "/")
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"  <title>{escape(site_title(index))}</title>",
+        f"  <link href={quoteattr(home)}/>",
+        f"  <link rel=\"self\" href={quoteattr(absolute_url(site_url, basepath, '/' + FEED_PATH))}/>",
+        f"  <id>{escape(home)}</id>",
+        f"  <updated>{updated}</updated>",
+    ]
+    for entry in entries:
+        url = absolute_url(site_url, basepath, entry["url"])
+        lines += [
+            "  <entry>",
+            f"    <title>{escape(entry['meta']['title'] or entry['url'])}</title>",
+            f"    <link href={quoteattr(url)}/>",
+            f"    <id>{escape(url)}</id>",
+            f"    <updated>{entry['meta']['date']}T00:00:00Z</updated>",
+        ]
+        lines += [f"    <category term={quoteattr(tag)}/>" for tag in entry["meta"]["tags"]]
+        lines.append("  </entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def sitemap(index, extra_urls, site_url, basepath="/"):
+    urls = dict.fromkeys(extra_urls)
+    urls.update((entry["url"], entry["meta"]["date"]) for _, entry in published(index))
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for url, lastmod in sorted(urls.items()):
+        lastmod = f"<lastmod>{lastmod}</lastmod>" if lastmod else ""
+        lines.append(f"  <url><loc>{escape(absolute_url(site_url, basepath, url))}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def collections_signature(index, *settings):
+    # Covers only what the generated pages show, so a body edit that leaves
+    # the front matter and title alone does not change it.
+    pages = [(rel_path, entry["url"], entry["meta"]) for rel_path, entry in published(index)]
+    payload = json.dumps([pages, list(settings)], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -1,79 +1,1060 @@
+import argparse
+import io
 import os
-import shutil
-import sys
-from textnode import markdown_to_html_node
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from assets import LINK_MODES, prune_empty_dirs, remove_asset, sync_static, sync_static_changes
+from assetstore import dedup_stats, prune_store, store_path_for
+from blockcache import DEFAULT_MAX_BYTES, cache_path_for, format_stats, open_block_cache
+from compress import DEFAULT_MIN_SIZE, compress_outputs, remove_compressed
+from fingerprint import ASSET_MANIFEST, asset_map, asset_map_digest, fingerprint_assets, write_asset_manifest
+from manifest import (
+    file_hash,
+    is_current,
+    load_manifest,
+    manifest_outputs,
+    manifest_path_for,
+    remove_stale_outputs,
+    save_manifest,
+    source_entry,
+    write_atomic,
+)
+from linkcheck import (
+    link_key,
+    load_state as load_link_state,
+    orphan_pages,
+    output_keys,
+    page_links,
+    save_state as save_link_state,
+    state_path_for as link_state_path_for,
+    update_graph,
+)
+from listings import (
+    FEED_PATH,
+    POSTS_PER_PAGE,
+    SITEMAP_PATH,
+    atom_feed,
+    collection_pages,
+    collections_signature,
+    output_for_url,
+    sitemap,
+)
+from memory import check_memory_budget
+from metadata import (
+    draft_sources,
+    first_heading,
+    index_path_for,
+    list_sources,
+    load_index,
+    parse_front_matter,
+    read_page_metadata,
+    refresh_index,
+    update_index,
+)
+from pipeline import run_pipeline
+from profiler import NULL_PROFILER, Profiler
+from search import load_state, page_terms, remove_search_files, save_state, state_path_for, update_state, write_search_files
+from shard import check_shards, link_outputs, parse_shard, partition, shard_dir_for, shard_record
+from template import load_template
+from htmlnode import ParentNode, url_resolver
+from textnode import block_title, block_to_html_node, scan_blocks
+from watch import watch
 
+CONTENT_DIR = "content"
+STATIC_DIR = "static"
+TEMPLATE_PATH = "template.html"
+DEST_DIR = "docs"
+BLOG_SECTION = "blog"
 
-def copy_files_recursive(source, destination):
-    if os.path.exists(destination):
-        shutil.rmtree(destination)
+
+class BuildOptions:
+    # What one run was asked to do, made once from the command line and passed
+    # down to every page. Worker processes get it without the profiler; they
+    # record events when profile is set and send them back with each result.
+    def __init__(
+        self,
+        jobs=1,
+        profiler=None,
+        cache_path=None,
+        pipeline=False,
+        assets=None,
+        minify=False,
+        search=None,
+        links=False,
+        max_memory=None,
+        shard=None,
+        drafts=None,
+        link_mode="copy",
+        fingerprint=False,
+    ):
+        self.jobs = jobs
+        self.profiler = profiler
+        self.profile = profiler is not None
+        self.cache_path = cache_path
+        self.pipeline = pipeline
+        self.assets = assets
+        self.minify = minify
+        self.search = search
+        self.links = links
+        self.max_memory = max_memory
+        self.shard = shard
+        self.drafts = drafts or set()
+        self.link_mode = link_mode
+        self.fingerprint = fingerprint
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["profiler"] = None
+        return state
+
+    def replace(self, **changes):
+        fields = {name: value for name, value in self.__dict__.items() if name != "profile"}
+        fields.update(changes)
+        return BuildOptions(**fields)
+
+
+DEFAULT_OPTIONS = BuildOptions()
+
+
+def extract_title(markdown):
+    # Lines are read lazily, stopping at the front matter title or first heading.
+    meta, body = parse_front_matter(io.StringIO(markdown))
+    title = meta["title"] or first_heading(body)
+    if title is None:
+        raise Exception("No h1 header found in markdown")
+    return title
+
+
+def render_typed_blocks(typed_blocks, block_cache=None, basepaths=("/",), title=None, options=DEFAULT_OPTIONS):
+    # Builds the page as blocks arrive from the scanner and picks up the title
+    # on the way, unless front matter already gave one, so the markdown is
+    # never held as one string. Returns one tree
+    # per basepath; without a block cache they are all the same tree, since
+    # URLs are resolved when it is serialized. Blocks already in the cache are
+    # reused as pre-rendered HTML, kept as plain strings so serializing the
+    # tree emits them untouched.
+    children = []
+    trees = {basepath: [] for basepath in basepaths}
+    asset_digest = asset_map_digest(options.assets)
+    for block, block_type in typed_blocks:
+        if title is None:
+            title = block_title(block, block_type)
+        if block_cache is None:
+            children.append(block_to_html_node(block, block_type))
+            continue
+        node = None
+        for basepath, children_for in trees.items():
+            key = block_cache.key(block, block_type, basepath, asset_digest, options.minify)
+            html = block_cache.get(key)
+            if html is None:
+                if node is None:
+                    node = block_to_html_node(block, block_type)
+                html = node.to_html(url_resolver(basepath, options.assets), options.minify)
+                block_cache.put(key, html)
+            children_for.append(html)
+    if title is None:
+        raise Exception("No h1 header found in markdown")
+    if block_cache is None:
+        return dict.fromkeys(basepaths, ParentNode("div", children)), title
+    return {basepath: ParentNode("div", children_for) for basepath, children_for in trees.items()}, title
+
+
+def prune_output_dirs(paths, dest_dir):
+    # Drop directories the removed outputs leave empty, so they 404 instead of being listed.
+    for path in paths:
+        prune_empty_dirs(os.path.dirname(path), dest_dir)
+
+
+def page_extras(tree, basepath, options=DEFAULT_OPTIONS):
+    # What the search index and link checker take from a rendered tree; it
+    # travels back from worker processes in the page's result.
+    extras = {}
+    if options.search is not None:
+        extras["search"] = page_terms(tree, options.search["skip_code"])
+    if options.links:
+        extras["links"] = page_links(tree, basepath, options.assets)
+    return extras
+
+
+def render_page(from_path, template_path, targets, options=DEFAULT_OPTIONS, profiler=NULL_PROFILER, block_cache=None):
+    # Parses the markdown once and writes it out for every (basepath, dest_path)
+    # target. Returns the page_extras asked for.
+    for _, dest_path in targets:
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    basepaths = [basepath for basepath, _ in targets]
     
-    os.mkdir(destination)
+    if profiler.enabled:
+        with profiler.stage(from_path, "read"):
+            with open(from_path, 'r') as f:
+                lines = f.readlines()
+        with profiler.stage(from_path, "block split"):
+            meta, body = parse_front_matter(lines)
+            typed_blocks = list(scan_blocks(body))
+        with profiler.stage(from_path, "inline parse"):
+            trees, title = render_typed_blocks(typed_blocks, block_cache, basepaths, meta["title"], options)
+    else:
+        with open(from_path, 'r') as f:
+            meta, body = parse_front_matter(f)
+            trees, title = render_typed_blocks(scan_blocks(body), block_cache, basepaths, meta["title"], options)
     
-    for item in os.listdir(source):
-        source_path = os.path.join(source, item)
-        destination_path = os.path.join(destination, item)
+    for basepath, dest_path in targets:
+        template = load_template(template_path, basepath, options.assets, options.minify)
+        content = partial(trees[basepath].iter_html, url_resolver(basepath, options.assets), options.minify)
         
-        if os.path.isfile(source_path):
-            shutil.copy(source_path, destination_path)
-            print(f"Copied file: {source_path}")
-        else:
-            copy_files_recursive(source_path, destination_path)
+        if not profiler.enabled:
+            write_atomic(dest_path, lambda f: template.write(f, {"Title": title, "Content": content}))
+            continue
+        
+        # Streaming interleaves the stages, so when profiling each one is materialized to time it.
+        with profiler.stage(from_path, "serialize"):
+            fragments = list(content())
+        with profiler.stage(from_path, "template fill"):
+            full_html = template.render({"Title": title, "Content": lambda: fragments})
+        with profiler.stage(from_path, "write"):
+            write_atomic(dest_path, lambda f: f.write(full_html))
+    
+    return page_extras(trees[basepaths[0]], basepaths[0], options)
 
 
-def extract_title(markdown):
-    lines = markdown.split('\n')
-    for line in lines:
-        if line.startswith('# '):
-            return line[2:].strip()
-    raise Exception("No h1 header found in markdown")
+def stream_blocks(from_path, basepath, options=DEFAULT_OPTIONS, block_cache=None, on_block=None):
+    # The page body one block at a time, straight from the file: the same
+    # fragments render_page's tree serializes to, without building the tree.
+    # on_block(i, block) sees each block's node, or its HTML on a cache hit.
+    resolve = url_resolver(basepath, options.assets)
+    asset_digest = asset_map_digest(options.assets)
+    yield "<div>"
+    with open(from_path, 'r') as f:
+        _, body = parse_front_matter(f)
+        for i, (block, block_type) in enumerate(scan_blocks(body)):
+            if block_cache is None:
+                node = block_to_html_node(block, block_type)
+            else:
+                key = block_cache.key(block, block_type, basepath, asset_digest, options.minify)
+                node = block_cache.get(key)
+                if node is None:
+                    node = block_to_html_node(block, block_type).to_html(resolve, options.minify)
+                    block_cache.put(key, node)
+            if on_block is not None:
+                on_block(i, node)
+            if isinstance(node, str):
+                yield node
+            else:
+                yield from node.iter_html(resolve, options.minify)
+    yield "</div>"
 
 
-def generate_page(from_path, template_path, dest_path, basepath="/"):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def stream_page(from_path, template_path, targets, options=DEFAULT_OPTIONS, block_cache=None):
+    # Bounded-memory render_page. The title comes from a first pass that stops
+    # at the front matter or first heading; each target then re-reads the
+    # source and writes it out a block at a time, so neither the page's tree
+    # nor its text is ever held whole.
+    for _, dest_path in targets:
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    title = read_page_metadata(from_path)["title"]
+    if title is None:
+        raise Exception("No h1 header found in markdown")
     
-    with open(from_path, 'r') as f:
-        markdown_content = f.read()
+    # Keyed by block number, so a template that repeats Content is counted once.
+    block_extras = {}
+    basepaths = [basepath for basepath, _ in targets]
+    collect = None
+    if options.search is not None or options.links:
+        def collect(i, node):
+            block_extras[i] = page_extras(node, basepaths[0], options)
     
-    with open(template_path, 'r') as f:
-        template_content = f.read()
+    for basepath, dest_path in targets:
+        template = load_template(template_path, basepath, options.assets, options.minify)
+        content = partial(stream_blocks, from_path, basepath, options, block_cache, collect)
+        write_atomic(dest_path, lambda f: template.write(f, {"Title": title, "Content": content}))
+        collect = None
     
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
+    extras = {}
+    if options.search is not None:
+        extras["search"] = {}
+        for i in sorted(block_extras):
+            for term, count in block_extras[i]["search"].items():
+                extras["search"][term] = extras["search"].get(term, 0) + count
+    if options.links:
+        extras["links"] = [url for i in sorted(block_extras) for url in block_extras[i]["links"]]
+    return extras
+
+
+def generate_page(from_path, template_path, dest_path, basepath="/", profiler=NULL_PROFILER, block_cache=None):
+    render_page(from_path, template_path, [(basepath, dest_path)], profiler=profiler, block_cache=block_cache)
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    return [
+        (source, os.path.join(dest_dir_path, os.path.relpath(source, dir_path_content))[:-3] + '.html')
+        for source in list_sources(dir_path_content)
+    ]
+
+
+def build_page(job, template_path, options=DEFAULT_OPTIONS):
+    # With max_memory (MB) the page is streamed and the process's peak RSS
+    # checked against it afterwards.
+    source, targets = job
+    result = {"source": source, "error": None}
+    profiler = Profiler() if options.profile else NULL_PROFILER
+    block_cache = open_block_cache(options.cache_path) if options.cache_path else None
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    try:
+        if options.max_memory is None:
+            result.update(render_page(source, template_path, targets, options, profiler, block_cache))
+        else:
+            result.update(stream_page(source, template_path, targets, options, block_cache))
+            check_memory_budget(options.max_memory, f"Rendering {source}")
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    if options.profile:
+        result["events"] = profiler.events
+    if block_cache is not None:
+        block_cache.commit()
+        result["cache"] = {"hits": block_cache.hits - hits, "misses": block_cache.misses - misses}
+    return result
+
+
+def read_page(job):
+    with open(job[0], 'r') as f:
+        return job, f.read()
+
+
+def render_page_text(entry, template_path, options=DEFAULT_OPTIONS):
+    # The pipeline's render stage: pages are rendered into memory and written
+    # by the pipeline's own writers.
+    (source, targets), markdown = entry
+    for _, dest_path in targets:
+        print(f"Generating page from {source} to {dest_path} using {template_path}")
+    result = {"source": source, "error": None}
+    outputs = []
+    block_cache = open_block_cache(options.cache_path) if options.cache_path else None
+    if block_cache is not None:
+        hits, misses = block_cache.hits, block_cache.misses
+    try:
+        # StringIO splits lines exactly as iterating the open file would.
+        basepaths = [basepath for basepath, _ in targets]
+        meta, body = parse_front_matter(io.StringIO(markdown))
+        trees, title = render_typed_blocks(scan_blocks(body), block_cache, basepaths, meta["title"], options)
+        for basepath, dest_path in targets:
+            template = load_template(template_path, basepath, options.assets, options.minify)
+            content = partial(trees[basepath].iter_html, url_resolver(basepath, options.assets), options.minify)
+            outputs.append((dest_path, template.render({"Title": title, "Content": content})))
+        result.update(page_extras(trees[basepaths[0]], basepaths[0], options))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        outputs = []
+    if block_cache is not None:
+        block_cache.commit()
+        result["cache"] = {"hits": block_cache.hits - hits, "misses": block_cache.misses - misses}
+    return result, outputs
+
+
+def write_outputs(entry):
+    result, outputs = entry
+    for dest_path, html in outputs:
+        write_atomic(dest_path, lambda f: f.write(html))
+    return result
+
+
+def run_pipeline_jobs(page_jobs, template_path, options=DEFAULT_OPTIONS):
+    render = partial(render_page_text, template_path=template_path, options=options)
+    # Rendering always goes to worker processes so the event loop only waits on I/O.
+    with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+        outcomes = run_pipeline(page_jobs, read_page, render, write_outputs, executor, renderers=options.jobs)
+    results = []
+    for (source, _), (result, error) in zip(page_jobs, outcomes):
+        if error is not None:
+            result = {"source": source, "error": f"{type(error).__name__}: {error}"}
+        results.append(result)
+    return results
+
+
+def run_page_jobs(page_jobs, template_path, options=DEFAULT_OPTIONS):
+    # Each job is (source, [(basepath, dest_path), ...]).
+    if options.pipeline and page_jobs:
+        return run_pipeline_jobs(page_jobs, template_path, options)
+    build = partial(build_page, template_path=template_path, options=options)
+    jobs = options.jobs
+    if jobs > 1 and len(page_jobs) > 1:
+        chunksize = max(1, len(page_jobs) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(build, page_jobs, chunksize=chunksize))
+    else:
+        results = [build(job) for job in page_jobs]
+    if options.profiler is not None:
+        for result in results:
+            options.profiler.merge(result["events"])
+    return results
+
+
+def failed_sources(results):
+    return {result["source"] for result in results if result["error"] is not None}
+
+
+def report_failures(results):
+    failures = [result for result in results if result["error"] is not None]
+    for result in failures:
+        print(f"Error generating page from {result['source']}: {result['error']}")
+    if failures:
+        raise Exception(f"{len(failures)} page(s) failed to build")
+
+
+def group_page_jobs(target_jobs):
+    # Merges each target's (source, dest_path) list into one job per source.
+    grouped = {}
+    for basepath, pages in target_jobs:
+        for source, dest in pages:
+            grouped.setdefault(source, []).append((basepath, dest))
+    return sorted(grouped.items())
+
+
+def generate_targets(dir_path_content, template_path, targets, options=DEFAULT_OPTIONS):
+    # Each target is (basepath, dest_dir_path, manifest_path). Pages that are
+    # stale in several targets are parsed once and written to each of them.
+    # Sources in drafts are not built, and their earlier outputs are removed.
+    # With shard=(i, n) only the i-th of n size-balanced parts of the site is
+    # built, and the manifest records which part for merge_shards.
+    drafts = options.drafts
+    shard = options.shard
+    assets = options.assets
+    assigned = None
+    if shard is not None:
+        sizes = {source: os.path.getsize(source) for source in list_sources(dir_path_content) if source not in drafts}
+        assigned = partition(sizes, shard[1])[shard[0] - 1]
+    states = []
+    for basepath, dest_dir_path, manifest_path in targets:
+        # Compile up front so template errors are reported once, not once per page.
+        load_template(template_path, basepath, assets, options.minify)
+        state = {
+            "basepath": basepath,
+            "dest_dir": dest_dir_path,
+            "manifest_path": manifest_path,
+            "pages": [page for page in collect_pages(dir_path_content, dest_dir_path) if page[0] not in drafts],
+            "pending": {},
+        }
+        if assigned is not None:
+            owned = set(assigned)
+            state["pages"] = [(source, dest) for source, dest in state["pages"] if source in owned]
+        if manifest_path is not None:
+            manifest = load_manifest(manifest_path)
+            template_hash = file_hash(template_path)
+            state["rebuild_all"] = (
+                manifest["template"] != template_hash
+                or manifest["basepath"] != basepath
+                or manifest.get("asset_map") != asset_map_digest(assets)
+                or manifest.get("minify", False) != options.minify
+            )
+            state["old_pages"] = manifest["pages"]
+            manifest["template"] = template_hash
+            manifest["basepath"] = basepath
+            manifest["asset_map"] = asset_map_digest(assets)
+            manifest["minify"] = options.minify
+            manifest["pages"] = {}
+            if assigned is not None:
+                manifest["shard"] = shard_record(shard[0], shard[1], assigned, sizes)
+            else:
+                manifest.pop("shard", None)
+            state["manifest"] = manifest
+        states.append(state)
     
-    title = extract_title(markdown_content)
+    try:
+        for state in states:
+            if state["manifest_path"] is None:
+                state["pending"] = {source: {"output": dest} for source, dest in state["pages"]}
+                continue
+            for source, dest in state["pages"]:
+                previous = state["old_pages"].get(source)
+                entry = source_entry(source, dest, previous)
+                if not state["rebuild_all"] and is_current(previous, entry):
+                    state["manifest"]["pages"][source] = entry
+                else:
+                    state["pending"][source] = entry
+        
+        page_jobs = group_page_jobs(
+            (state["basepath"], [(source, entry["output"]) for source, entry in state["pending"].items()])
+            for state in states
+        )
+        results = run_page_jobs(page_jobs, template_path, options)
+        failed = failed_sources(results)
+        for state in states:
+            if state["manifest_path"] is None:
+                continue
+            new_pages = state["manifest"]["pages"]
+            for source, entry in state["pending"].items():
+                if source not in failed:
+                    new_pages[source] = entry
+                elif source in state["old_pages"]:
+                    new_pages[source] = state["old_pages"][source]
+            state["removed"] = remove_stale_outputs(state["old_pages"], new_pages)
+            prune_output_dirs(state["removed"], state["dest_dir"])
+    except Exception:
+        # Keep tracking what is still on disk so the next build can pick up from here.
+        for state in states:
+            if state["manifest_path"] is not None:
+                for source, entry in state["old_pages"].items():
+                    state["manifest"]["pages"].setdefault(source, entry)
+        raise
+    finally:
+        for state in states:
+            if state["manifest_path"] is not None:
+                save_manifest(state["manifest_path"], state["manifest"])
     
-    full_html = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
-    full_html = full_html.replace('href="/', f'href="{basepath}')
-    full_html = full_html.replace('src="/', f'src="{basepath}')
+    for state in states:
+        if state["manifest_path"] is not None:
+            generated = len(state["pending"]) - len(failed & set(state["pending"]))
+            unchanged = len(state["pages"]) - len(state["pending"])
+            print(f"Generated {generated} page(s), {unchanged} unchanged, {len(state['removed'])} removed")
+    report_failures(results)
+    return results
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/", manifest_path=None, jobs=1, profiler=None, cache_path=None):
+    options = BuildOptions(jobs=jobs, profiler=profiler, cache_path=cache_path)
+    return generate_targets(dir_path_content, template_path, [(basepath, dest_dir_path, manifest_path)], options)
+
+
+def is_under(path, directory):
+    return os.path.commonpath([os.path.abspath(path), os.path.abspath(directory)]) == os.path.abspath(directory)
+
+
+def rebuild_pages(sources, removed, dir_path_content, template_path, targets, options=DEFAULT_OPTIONS):
+    # A page that became a draft is removed like a deleted one.
+    drafts = options.drafts
+    removed = set(removed) | (set(sources) & drafts)
+    sources = set(sources) - drafts
+    manifests = [load_manifest(manifest_path) for _, _, manifest_path in targets]
+    for (_, dest_dir_path, _), manifest in zip(targets, manifests):
+        for source in sorted(removed):
+            entry = manifest["pages"].pop(source, None)
+            if entry is not None and os.path.exists(entry["output"]):
+                os.remove(entry["output"])
+                print(f"Removed stale page: {entry['output']}")
+                prune_output_dirs([entry["output"]], dest_dir_path)
     
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    target_jobs = []
+    for basepath, dest_dir_path, _ in targets:
+        pages = []
+        for source in sorted(sources):
+            pages.append((source, os.path.join(dest_dir_path, os.path.relpath(source, dir_path_content))[:-3] + '.html'))
+        target_jobs.append((basepath, pages))
+    results = run_page_jobs(group_page_jobs(target_jobs), template_path, options)
+    failed = failed_sources(results)
+    for (_, pages), (_, _, manifest_path), manifest in zip(target_jobs, targets, manifests):
+        for source, dest in pages:
+            if source not in failed:
+                manifest["pages"][source] = source_entry(source, dest)
+        save_manifest(manifest_path, manifest)
+    report_failures(results)
+    return results
+
+
+def fingerprint_targets(targets, enabled=True):
+    # Links each target's static files to content-hashed names and returns the
+    # asset map pages are resolved with, or None when fingerprinting is off
+    # (in which case hashed names left by earlier builds are removed).
+    assets = None
+    for _, dest_dir_path, manifest_path in targets:
+        manifest = load_manifest(manifest_path)
+        previous = manifest.get("fingerprints") or {}
+        if not enabled and not previous:
+            continue
+        fingerprints, stats = fingerprint_assets(dest_dir_path, manifest["assets"] if enabled else {}, previous)
+        manifest["fingerprints"] = fingerprints
+        save_manifest(manifest_path, manifest)
+        asset_manifest = os.path.join(dest_dir_path, ASSET_MANIFEST)
+        if enabled:
+            assets = asset_map(fingerprints)
+            write_asset_manifest(dest_dir_path, assets)
+            print(f"Fingerprinted {stats['hashed']} asset(s), {stats['unchanged']} unchanged, {stats['removed']} removed")
+        elif os.path.exists(asset_manifest):
+            os.remove(asset_manifest)
+    return assets
+
+
+def current_asset_map(targets, enabled=True):
+    if not enabled:
+        return None
+    return asset_map(load_manifest(targets[0][2]).get("fingerprints") or {})
+
+
+def shard_targets(targets, index, count):
+    # Where shard index of count builds each target.
+    shard_dirs = [(basepath, shard_dir_for(dest_dir, index, count)) for basepath, dest_dir, _ in targets]
+    return [(basepath, shard_dir, manifest_path_for(shard_dir)) for basepath, shard_dir in shard_dirs]
+
+
+def merge_shards(dir_path_content, targets, count, drafts=None):
+    # Checks that shards 1..count of each target together built every page
+    # exactly once, then links their files into the target and writes its
+    # manifest as if it had been built in one piece. Nothing in the target is
+    # touched unless every target's shards check out.
+    merges = []
+    drafts = drafts or set()
+    sources = [source for source in list_sources(dir_path_content) if source not in drafts]
+    for target in targets:
+        shards = [shard_targets([target], index, count)[0] for index in range(1, count + 1)]
+        manifests = {
+            index: load_manifest(manifest_path) if os.path.exists(manifest_path) else None
+            for index, (_, _, manifest_path) in enumerate(shards, 1)
+        }
+        problems = check_shards(manifests, count, sources)
+        if not problems and manifests[1]["basepath"] != target[0]:
+            problems.append(f"shards were built for basepath {manifests[1]['basepath']}, not {target[0]}")
+        if problems:
+            for problem in problems:
+                print(f"Cannot merge into {target[1]}: {problem}")
+            raise Exception(f"{len(problems)} problem(s) merging {count} shard(s) into {target[1]}")
+        merges.append((target, shards, manifests))
+    
+    for (_, dest_dir, manifest_path), shards, manifests in merges:
+        manifest = load_manifest(manifest_path)
+        old_pages = manifest["pages"]
+        old_static = set(manifest.get("assets") or {}) | {entry["output"] for entry in (manifest.get("fingerprints") or {}).values()}
+        first = manifests[1]
+        for key in ("template", "basepath", "asset_map", "minify", "assets", "fingerprints"):
+            if key in first:
+                manifest[key] = first[key]
+            else:
+                manifest.pop(key, None)
+        pages = {}
+        placed = set()
+        linked = 0
+        for (_, shard_dir, _), shard_manifest in zip(shards, manifests.values()):
+            for source in shard_manifest["shard"]["pages"]:
+                entry = dict(shard_manifest["pages"][source])
+                entry["output"] = os.path.join(dest_dir, os.path.relpath(entry["output"], shard_dir))
+                pages[source] = entry
+            linked += link_outputs(shard_dir, dest_dir, placed)
+        manifest["pages"] = pages
+        manifest.pop("shard", None)
+        removed = remove_stale_outputs(old_pages, pages)
+        prune_output_dirs(removed, dest_dir)
+        new_static = set(manifest.get("assets") or {}) | {entry["output"] for entry in (manifest.get("fingerprints") or {}).values()}
+        for rel_path in sorted(old_static - new_static):
+            remove_asset(dest_dir, rel_path)
+        asset_manifest = os.path.join(dest_dir, ASSET_MANIFEST)
+        if ASSET_MANIFEST not in placed and os.path.exists(asset_manifest):
+            os.remove(asset_manifest)
+        save_manifest(manifest_path, manifest)
+        print(f"Merged {count} shard(s) into {dest_dir}: {len(pages)} page(s), {linked} file(s) linked, {len(removed)} removed")
+
+
+def rebuild_changes(changed, removed, dir_path_content, static_dir, template_path, targets, options=DEFAULT_OPTIONS):
+    # A static edit re-copies that one file, a markdown edit re-renders that one
+    # page, and a template edit re-renders every page. Targets after the first
+    # link their static files to the first one's copies. With fingerprinting,
+    # a static edit that changes an asset's hash re-renders every page.
+    static_changed = {path for path in changed if is_under(path, static_dir)}
+    static_removed = {path for path in removed if is_under(path, static_dir)}
+    if static_changed or static_removed:
+        origin = None
+        link_mode = options.link_mode
+        store = store_path_for(targets[0][1]) if link_mode == "store" else None
+        for _, dest_dir_path, manifest_path in targets:
+            sync_static_changes(static_changed, static_removed, static_dir, dest_dir_path, manifest_path, link_mode, origin, store)
+            if origin is None and store is None:
+                origin, link_mode = dest_dir_path, "hardlink"
+        if options.fingerprint:
+            options = options.replace(assets=fingerprint_targets(targets))
+            return generate_targets(dir_path_content, template_path, targets, options)
     
-    with open(dest_path, 'w') as f:
-        f.write(full_html)
+    options = options.replace(assets=current_asset_map(targets, options.fingerprint))
+    if template_path in changed:
+        return generate_targets(dir_path_content, template_path, targets, options)
+    pages_changed = {path for path in changed if path.endswith('.md') and is_under(path, dir_path_content)}
+    pages_removed = {path for path in removed if path.endswith('.md') and is_under(path, dir_path_content)}
+    if pages_changed or pages_removed:
+        return rebuild_pages(pages_changed, pages_removed, dir_path_content, template_path, targets, options)
+    return []
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath="/"):
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
-        dest_path = os.path.join(dest_dir_path, item)
+def collection_section(dir_path_content, section):
+    if section is not None and not os.path.isdir(os.path.join(dir_path_content, section)):
+        return None
+    return section
+
+
+def generate_collections(index, dir_path_content, template_path, targets, section=BLOG_SECTION, site_url=None, per_page=POSTS_PER_PAGE, options=DEFAULT_OPTIONS):
+    # Listings, tag pages, the feed and the sitemap come from the metadata
+    # index alone and are only rewritten when what they show changes.
+    section = collection_section(dir_path_content, section)
+    assets, minify = options.assets, options.minify
+    template_hash = file_hash(template_path)
+    pages = None
+    for basepath, dest_dir_path, manifest_path in targets:
+        manifest = load_manifest(manifest_path)
+        signature = collections_signature(index, template_hash, basepath, section, site_url, per_page, asset_map_digest(assets), minify)
+        previous = manifest.get("collections") or {"signature": None, "outputs": []}
+        if previous["signature"] == signature and all(os.path.exists(path) for path in previous["outputs"]):
+            continue
+        
+        if pages is None:
+            pages = collection_pages(index, section, per_page)
+        # A content page at the same path wins over a generated one.
+        taken = {os.path.normpath(entry["output"]) for entry in manifest["pages"].values()}
+        template = load_template(template_path, basepath, assets, minify)
+        resolve = url_resolver(basepath, assets)
+        outputs = []
+        for url, title, node in pages:
+            dest_path = os.path.normpath(os.path.join(dest_dir_path, output_for_url(url)))
+            if dest_path in taken:
+                continue
+            content = partial(node.iter_html, resolve, minify)
+            write_atomic(dest_path, lambda f: template.write(f, {"Title": title, "Content": content}))
+            outputs.append(dest_path)
+        if site_url:
+            extra_urls = [url for url, _, _ in pages]
+            documents = [
+                (FEED_PATH, atom_feed(index, section, site_url, basepath)),
+                (SITEMAP_PATH, sitemap(index, extra_urls, site_url, basepath)),
+            ]
+            for name, text in documents:
+                dest_path = os.path.normpath(os.path.join(dest_dir_path, name))
+                write_atomic(dest_path, lambda f: f.write(text))
+                outputs.append(dest_path)
         
-        if os.path.isfile(item_path):
-            if item.endswith('.md'):
-                dest_html_path = dest_path.replace('.md', '.html')
-                generate_page(item_path, template_path, dest_html_path, basepath)
+        for path in previous["outputs"]:
+            if path not in outputs and path not in taken and os.path.exists(path):
+                os.remove(path)
+                print(f"Removed stale page: {path}")
+                prune_empty_dirs(os.path.dirname(path), dest_dir_path)
+        manifest["collections"] = {"signature": signature, "outputs": outputs}
+        save_manifest(manifest_path, manifest)
+        print(f"Generated {len(outputs)} collection page(s) in {dest_dir_path}")
+
+
+def report_block_cache(results, cache_path, max_bytes=DEFAULT_MAX_BYTES):
+    hits = sum(result["cache"]["hits"] for result in results if "cache" in result)
+    misses = sum(result["cache"]["misses"] for result in results if "cache" in result)
+    block_cache = open_block_cache(cache_path)
+    evicted = block_cache.evict(max_bytes)
+    message = format_stats(hits, misses, block_cache.stats())
+    print(f"{message}, {evicted} evicted" if evicted else message)
+
+
+def site_targets(args):
+    # (basepath, dest_dir, manifest_path) for every output this run builds.
+    pairs = args.target or [(args.basepath, DEST_DIR)]
+    return [(basepath, dest_dir, manifest_path_for(dest_dir)) for basepath, dest_dir in pairs]
+
+
+def block_cache_path(args, targets):
+    # One cache serves every target; its keys already include the basepath.
+    return cache_path_for(targets[0][1]) if args.block_cache else None
+
+
+def report_asset_store(targets, store):
+    # Drops objects no output uses any more and reports what sharing saved.
+    asset_sets = [load_manifest(manifest_path)["assets"] for _, _, manifest_path in targets]
+    stats = dedup_stats(asset_sets)
+    pruned = prune_store(store, {entry["hash"] for assets in asset_sets for entry in assets.values()})
+    print(
+        f"Asset store: {stats['objects']} object(s), {stats['stored']} bytes stored, "
+        f"{stats['saved']} bytes saved by deduplication, {pruned} pruned"
+    )
+
+
+def sync_targets(args, targets):
+    # The first target gets real copies; the rest hardlink to them. In store
+    # mode every target links to the shared store instead.
+    if args.link == "store":
+        store = store_path_for(targets[0][1])
+        for _, dest_dir, manifest_path in targets:
+            sync_static(STATIC_DIR, dest_dir, manifest_path, args.checksum, "store", store=store)
+        report_asset_store(targets, store)
+        return
+    origin = None
+    link_mode = args.link
+    for _, dest_dir, manifest_path in targets:
+        sync_static(STATIC_DIR, dest_dir, manifest_path, args.checksum, link_mode, origin)
+        if origin is None:
+            origin, link_mode = dest_dir, "hardlink"
+
+
+def refresh_metadata(targets):
+    index, updated = refresh_index(CONTENT_DIR, index_path_for(targets[0][1]))
+    print(f"Metadata index: {len(index['pages'])} page(s), {updated} updated")
+    return index
+
+
+def search_options(args):
+    return {"skip_code": args.search_skip_code} if args.search else None
+
+
+def build_options(args, targets, jobs):
+    # Assets and drafts are filled in per build, once they are known.
+    return BuildOptions(
+        jobs=jobs,
+        profiler=Profiler() if args.profile else None,
+        cache_path=block_cache_path(args, targets),
+        pipeline=args.pipeline,
+        minify=args.minify,
+        search=search_options(args),
+        links=args.check_links,
+        max_memory=args.max_memory,
+        link_mode=args.link,
+        fingerprint=args.fingerprint,
+    )
+
+
+def update_search(targets, index, results, search=None):
+    # Terms of pages rendered this run come back with their results; other
+    # pages keep the terms saved last time unless their source moved.
+    path = state_path_for(targets[0][1])
+    if search is None:
+        if os.path.exists(path):
+            os.remove(path)
+            for _, dest_dir, _ in targets:
+                remove_search_files(dest_dir)
+        return
+    state = load_state(path, search["skip_code"])
+    rendered = {os.path.relpath(result["source"], CONTENT_DIR): result["search"] for result in results if "search" in result}
+    shards, listing_changed = update_state(state, index, CONTENT_DIR, rendered)
+    for _, dest_dir, _ in targets:
+        write_search_files(dest_dir, state, shards, listing_changed)
+    save_state(path, state)
+    print(f"Search index: {len(state['pages'])} page(s), {len(shards)} shard(s) updated")
+
+
+def listing_keys(index, section, per_page, taken):
+    # What the generated listings link to; a listing whose URL a content
+    # page already has is never written, so its links do not count.
+    keys = set()
+    for url, _, node in collection_pages(index, section, per_page):
+        if url not in taken:
+            keys.update(link_key(link, url) for link in page_links(node))
+    return keys
+
+
+def check_links(targets, index, results, section=BLOG_SECTION, per_page=POSTS_PER_PAGE):
+    # The first target stands for all of them: every target holds the same
+    # files. Links of pages rendered this run come back with their results.
+    _, dest_dir, manifest_path = targets[0]
+    path = link_state_path_for(dest_dir)
+    state = load_link_state(path)
+    rendered = {os.path.relpath(result["source"], CONTENT_DIR): result["links"] for result in results if "links" in result}
+    outputs = output_keys(manifest_outputs(dest_dir, load_manifest(manifest_path)))
+    checked = update_graph(state, index, CONTENT_DIR, outputs, rendered)
+    save_link_state(path, state)
+    
+    broken = [(rel_path, url) for rel_path, page in sorted(state["pages"].items()) for url in page["broken"]]
+    for rel_path, url in broken:
+        print(f"Broken link in {os.path.join(CONTENT_DIR, rel_path)}: {url}")
+    taken = {page["url"] for page in state["pages"].values()}
+    listed = listing_keys(index, collection_section(CONTENT_DIR, section), per_page, taken)
+    orphans = orphan_pages(state, listed)
+    for rel_path in orphans:
+        print(f"Orphan page: {os.path.join(CONTENT_DIR, rel_path)}")
+    print(f"Links: {len(checked)} page(s) checked, {len(broken)} broken link(s), {len(orphans)} orphan page(s)")
+    return broken, orphans
+
+
+def compress_targets(args, targets, jobs):
+    for _, dest_dir, manifest_path in targets:
+        if args.gzip:
+            compress_outputs(dest_dir, manifest_path, jobs, args.gzip_min_size)
         else:
-            generate_pages_recursive(item_path, template_path, dest_path, basepath)
+            remove_compressed(dest_dir, manifest_path)
+
+
+def build_site(args, targets, options):
+    sync_targets(args, targets)
+    options = options.replace(assets=fingerprint_targets(targets, options.fingerprint))
+    index = refresh_metadata(targets)
+    options = options.replace(drafts=draft_sources(index, CONTENT_DIR))
+    try:
+        results = generate_targets(CONTENT_DIR, TEMPLATE_PATH, targets, options)
+        generate_collections(index, CONTENT_DIR, TEMPLATE_PATH, targets, args.section, args.site_url, args.per_page, options)
+        update_search(targets, index, results, options.search)
+        if options.links:
+            check_links(targets, index, results, args.section, args.per_page)
+        compress_targets(args, targets, options.jobs)
+        if options.cache_path:
+            report_block_cache(results, options.cache_path, args.cache_size * 1024 * 1024)
+        check_memory_budget(options.max_memory, "The build")
+    finally:
+        if options.profiler is not None:
+            print(options.profiler.summary())
+            options.profiler.write_trace(args.profile)
+            print(f"Wrote trace to {args.profile}")
+
+
+def build_shard(args, targets, options):
+    # Static files and this shard's pages go to per-shard directories beside
+    # each target. Collections, search, link checks and compression need the
+    # whole site, so they run when the shards are merged.
+    index, count = args.shard
+    # Shards run side by side, so the shared metadata index is read but not saved.
+    site_index = load_index(index_path_for(targets[0][1]))
+    update_index(site_index, CONTENT_DIR)
+    targets = shard_targets(targets, index, count)
+    sync_targets(args, targets)
+    options = options.replace(
+        assets=fingerprint_targets(targets, options.fingerprint),
+        search=None,
+        links=False,
+        shard=args.shard,
+        drafts=draft_sources(site_index, CONTENT_DIR),
+    )
+    results = generate_targets(CONTENT_DIR, TEMPLATE_PATH, targets, options)
+    if options.cache_path:
+        report_block_cache(results, options.cache_path, args.cache_size * 1024 * 1024)
+    check_memory_budget(options.max_memory, f"Shard {index}/{count}")
+
+
+def merge_site(args, targets, options):
+    index = refresh_metadata(targets)
+    merge_shards(CONTENT_DIR, targets, args.merge_shards, draft_sources(index, CONTENT_DIR))
+    options = options.replace(assets=current_asset_map(targets, options.fingerprint))
+    generate_collections(index, CONTENT_DIR, TEMPLATE_PATH, targets, args.section, args.site_url, args.per_page, options)
+    update_search(targets, index, [], options.search)
+    if options.links:
+        check_links(targets, index, [], args.section, args.per_page)
+    compress_targets(args, targets, options.jobs)
+
+
+def watch_site(args, targets, options):
+    # Rebuilds are not profiled: nothing would report their events.
+    options = options.replace(profiler=None)
+    
+    def on_change(changed, removed):
+        start = time.perf_counter()
+        try:
+            index = refresh_metadata(targets)
+            drafts = draft_sources(index, CONTENT_DIR)
+            results = rebuild_changes(changed, removed, CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH, targets, options.replace(drafts=drafts))
+            rebuilt = options.replace(assets=current_asset_map(targets, options.fingerprint))
+            generate_collections(index, CONTENT_DIR, TEMPLATE_PATH, targets, args.section, args.site_url, args.per_page, rebuilt)
+            update_search(targets, index, results, options.search)
+            if options.links:
+                check_links(targets, index, results, args.section, args.per_page)
+            compress_targets(args, targets, options.jobs)
+            if options.cache_path and results:
+                report_block_cache(results, options.cache_path, args.cache_size * 1024 * 1024)
+            print(f"Rebuilt {len(changed) + len(removed)} change(s) in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            print(f"Rebuild failed: {e}")
+    
+    print(f"Watching {CONTENT_DIR}/, {STATIC_DIR}/ and {TEMPLATE_PATH} for changes (Ctrl-C to stop)")
+    try:
+        watch([CONTENT_DIR, STATIC_DIR, TEMPLATE_PATH], on_change, args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def shard_arg(text):
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site from content/ and static/ into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix for root-relative links")
+    parser.add_argument(
+        "--target",
+        nargs=2,
+        action="append",
+        metavar=("BASEPATH", "DIR"),
+        help="build into DIR with BASEPATH instead of docs/; repeat to build several outputs from one parse",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="render pages across N processes (0 for one per CPU)")
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--link", choices=LINK_MODES, default="copy", help="how changed static files are placed in the output (store: one hardlinked copy per distinct file)")
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="overlap reading, rendering and writing pages with an asyncio pipeline",
+    )
+    parser.add_argument("--section", default=BLOG_SECTION, help="content directory whose pages get a paginated listing")
+    parser.add_argument("--per-page", type=int, default=POSTS_PER_PAGE, help="entries per listing page")
+    parser.add_argument("--site-url", help="absolute site URL; enables the Atom feed and sitemap.xml")
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also publish static files under content-hashed names and point pages and the template at them",
+    )
+    parser.add_argument("--minify", action="store_true", help="collapse insignificant whitespace in pages as they are written")
+    parser.add_argument("--search", action="store_true", help="write a prefix-sharded search index under search/")
+    parser.add_argument("--search-skip-code", action="store_true", help="leave code blocks and inline code out of the search index")
+    parser.add_argument("--check-links", action="store_true", help="report internal links to missing pages or files, and pages nothing links to")
+    parser.add_argument("--gzip", action="store_true", help="write .gz sidecars for text outputs")
+    parser.add_argument("--gzip-min-size", type=int, default=DEFAULT_MIN_SIZE, help="smallest file in bytes that gets a .gz sidecar")
+    parser.add_argument("--watch", action="store_true", help="keep running and rebuild what changed")
+    parser.add_argument("--interval", type=float, default=0.2, help="seconds between change polls in --watch mode")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="build-trace.json",
+        metavar="TRACE",
+        help="time each stage of every rendered page, print the slowest and write a Chrome trace (default build-trace.json)",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        metavar="MB",
+        help="stream each page to disk a block at a time and fail any build process whose peak RSS exceeds MB",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_arg,
+        metavar="I/N",
+        help="build only part I of N of the pages, into DIR.shard-I-of-N beside each output, for --merge-shards",
+    )
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="N",
+        help="check that shards 1/N..N/N together built every page, link them into each output and finish the build",
+    )
+    parser.add_argument("--no-block-cache", dest="block_cache", action="store_false", help="render every block instead of reusing cached HTML")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="block cache size cap in MB")
+    args = parser.parse_args(argv)
+    if args.pipeline and args.profile:
+        parser.error("--profile times each stage in turn and cannot be combined with --pipeline")
+    if args.max_memory is not None and (args.pipeline or args.profile):
+        parser.error("--max-memory streams pages and cannot be combined with --pipeline or --profile")
+    if (args.shard or args.merge_shards) and args.watch:
+        parser.error("--shard and --merge-shards build once and cannot be combined with --watch")
+    if args.shard and args.merge_shards:
+        parser.error("--shard builds one part of the site and --merge-shards combines them; run them separately")
+    if args.merge_shards is not None and args.merge_shards < 1:
+        parser.error("--merge-shards needs at least one shard")
+    if args.shard and args.profile:
+        parser.error("--profile cannot be combined with --shard")
+    if args.target:
+        dest_dirs = [os.path.normpath(dest_dir) for _, dest_dir in args.target]
+        if len(set(dest_dirs)) != len(dest_dirs):
+            parser.error("each --target needs its own DIR")
+    return args
 
 
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
+def main(argv=None):
+    args = parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
     
     script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(script_dir)
     
-    copy_files_recursive("static", "docs")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    targets = site_targets(args)
+    options = build_options(args, targets, jobs)
+    if args.shard:
+        build_shard(args, targets, options)
+        return
+    if args.merge_shards:
+        merge_site(args, targets, options)
+        return
+    if not args.watch:
+        build_site(args, targets, options)
+        return
+    try:
+        build_site(args, targets, options)
+    except Exception as e:
+        print(f"Build failed: {e}")
+    watch_site(args, targets, options)
 
 
 if __name__ == "__main__":
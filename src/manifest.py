@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".manifest.json"
+
+
+def new_manifest():
+    return {"version": MANIFEST_VERSION, "template": None, "basepath": None, "pages": {}}
+
+
+def load_json_state(path, version, default):
+    # A missing, unreadable or other-version file gives default() instead, so
+    # the caller starts over rather than failing.
+    if not os.path.exists(path):
+        return default()
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return default()
+    if not isinstance(state, dict) or state.get("version") != version:
+        return default()
+    return state
+
+
+def replace_atomic(path, create):
+    # create(tmp_path) makes the new file beside the target and it is swapped
+    # in only once complete, so a crash or failure never leaves half a file.
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        create(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_atomic(path, write, mode='w'):
+    def create(tmp_path):
+        with open(tmp_path, mode) as f:
+            write(f)
+    replace_atomic(path, create)
+
+
+def save_json_state(path, state, indent=None, separators=None):
+    write_atomic(path, lambda f: json.dump(state, f, indent=indent, separators=separators, sort_keys=True))
+
+
+def load_manifest(path):
+    return load_json_state(path, MANIFEST_VERSION, new_manifest)
+
+
+def save_manifest(path, manifest):
+    save_json_state(path, manifest, indent=2)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_entry(path, previous=None):
+    # Only re-hash a file whose size or mtime moved since previous was taken.
+    stat = os.stat(path)
+    if (
+        previous is not None
+        and "hash" in previous
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime") == stat.st_mtime_ns
+    ):
+        path_hash = previous["hash"]
+    else:
+        path_hash = file_hash(path)
+    return {"hash": path_hash, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+
+def source_entry(source, dest, previous=None):
+    return dict(hashed_entry(source, previous), output=dest)
+
+
+def is_current(previous, entry):
+    return (
+        previous is not None
+        and previous.get("hash") == entry["hash"]
+        and previous.get("output") == entry["output"]
+        and os.path.exists(entry["output"])
+    )
+
+
+def manifest_outputs(dest_dir_path, manifest):
+    # Pages, generated collections, static files and their fingerprinted names.
+    paths = [os.path.relpath(entry["output"], dest_dir_path) for entry in manifest["pages"].values()]
+    paths += [os.path.relpath(path, dest_dir_path) for path in (manifest.get("collections") or {}).get("outputs", [])]
+    paths += list(manifest["assets"])
+    paths += [entry["output"] for entry in (manifest.get("fingerprints") or {}).values()]
+    return paths
+
+
+def remove_stale_outputs(old_pages, new_pages):
+    live_outputs = {entry["output"] for entry in new_pages.values()}
+    removed = []
+    for source, entry in old_pages.items():
+        if source in new_pages or entry["output"] in live_outputs:
+            continue
+        if os.path.exists(entry["output"]):
+            os.remove(entry["output"])
+            print(f"Removed stale page: {entry['output']}")
+            removed.append(entry["output"])
+    return removed
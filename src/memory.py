@@ -0,0 +1,28 @@
+import resource
+import sys
+
+# Peak resident memory of the current process, for --max-memory.
+
+
+def peak_rss():
+    # On Linux ru_maxrss survives exec, so a build started from a large
+    # process (a test runner, say) would report that process's peak; the
+    # high-water mark in /proc belongs to this program's own address space.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def check_memory_budget(budget_mb, what):
+    if budget_mb is None:
+        return
+    peak_mb = peak_rss() / (1024 * 1024)
+    if peak_mb > budget_mb:
+        raise MemoryError(f"{what} peaked at {peak_mb:.0f} MB, over the {budget_mb} MB budget")
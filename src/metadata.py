@@ -0,0 +1,218 @@
+import datetime
+import itertools
+import os
+from manifest import load_json_state, save_json_state
+from textnode import block_title, scan_blocks
+
+INDEX_VERSION = 1
+FRONT_MATTER_FENCE = "---"
+
+
+def index_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".metadata.json"
+
+
+def new_index():
+    return {"version": INDEX_VERSION, "pages": {}}
+
+
+def load_index(path):
+    return load_json_state(path, INDEX_VERSION, new_index)
+
+
+def save_index(path, index):
+    save_json_state(path, index, indent=2)
+
+
+def _scalar(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def _flag(key, value):
+    lowered = value.lower()
+    if lowered in ("true", "yes", "on"):
+        return True
+    if lowered in ("false", "no", "off", ""):
+        return False
+    raise ValueError(f"Front matter {key} must be true or false, got {value!r}")
+
+
+def _text(fields, key):
+    # A bare `key:` is read as an empty list in case items follow.
+    value = fields.get(key, "")
+    return "" if value == [] else value
+
+
+def normalize_metadata(fields):
+    meta = dict(fields)
+    meta["title"] = _text(fields, "title") or None
+    date = _text(fields, "date")
+    if date:
+        try:
+            meta["date"] = datetime.date.fromisoformat(date[:10]).isoformat()
+        except ValueError:
+            raise ValueError(f"Front matter date must be YYYY-MM-DD, got {date!r}")
+    else:
+        meta["date"] = None
+    tags = fields.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")]
+    meta["tags"] = [tag for tag in tags if tag]
+    meta["draft"] = _flag("draft", _text(fields, "draft"))
+    return meta
+
+
+def parse_front_matter(lines):
+    # A YAML-style subset: `key: value`, `key: [a, b]` and `key:` followed by
+    # `- item` lines. Returns the metadata and an iterator over the lines
+    # after the closing fence, so the body is never read here.
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None or first.rstrip() != FRONT_MATTER_FENCE:
+        return normalize_metadata({}), itertools.chain([] if first is None else [first], lines)
+
+    fields = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped == FRONT_MATTER_FENCE:
+            return normalize_metadata(fields), lines
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and isinstance(fields.get(key), list):
+            fields[key].append(_scalar(stripped[2:].strip()))
+            continue
+        name, sep, value = stripped.partition(":")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid front matter line: {line.rstrip()!r}")
+        key = name.strip().lower()
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            fields[key] = [_scalar(item.strip()) for item in value[1:-1].split(",") if item.strip()]
+        elif value:
+            fields[key] = _scalar(value)
+        else:
+            fields[key] = []
+    raise ValueError("Front matter is missing its closing ---")
+
+
+def first_heading(lines):
+    # Scans blocks only until the first one with a title.
+    for block, block_type in scan_blocks(lines):
+        title = block_title(block, block_type)
+        if title is not None:
+            return title
+    return None
+
+
+def page_url(rel_path):
+    # content/blog/tom/index.md is served as /blog/tom, other.md as /other.html.
+    rel_path = rel_path.replace(os.sep, "/")
+    if rel_path == "index.md":
+        return "/"
+    if rel_path.endswith("/index.md"):
+        return "/" + rel_path[:-len("/index.md")]
+    return "/" + rel_path[:-3] + ".html"
+
+
+def read_page_metadata(source):
+    # Reads the front matter and, only when it has no title, as far as the
+    # first heading.
+    with open(source, 'r') as f:
+        try:
+            meta, body = parse_front_matter(f)
+        except ValueError as e:
+            raise ValueError(f"{source}: {e}")
+        if meta["title"] is None:
+            meta["title"] = first_heading(body)
+    return meta
+
+
+def _scan_sorted(dir_path):
+    with os.scandir(dir_path) as entries:
+        return sorted(entries, key=lambda entry: entry.name)
+
+
+def list_sources(dir_path_content):
+    # A stack of directory listings instead of recursion, in name order, so
+    # only one listing per level is held and depth is unbounded.
+    sources = []
+    stack = [iter(_scan_sorted(dir_path_content))]
+    while stack:
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+        elif entry.is_dir():
+            stack.append(iter(_scan_sorted(entry.path)))
+        elif entry.name.endswith(".md"):
+            sources.append(entry.path)
+    return sources
+
+
+def update_index(index, dir_path_content):
+    # Re-reads only sources whose size or mtime moved. Returns how many
+    # entries were re-read or dropped.
+    old_pages = index["pages"]
+    pages = {}
+    updated = 0
+    for source in list_sources(dir_path_content):
+        rel_path = os.path.relpath(source, dir_path_content)
+        stat = os.stat(source)
+        previous = old_pages.get(rel_path)
+        if previous is not None and previous["size"] == stat.st_size and previous["mtime"] == stat.st_mtime_ns:
+            pages[rel_path] = previous
+            continue
+        pages[rel_path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "url": page_url(rel_path),
+            "meta": read_page_metadata(source),
+        }
+        updated += 1
+    updated += sum(1 for rel_path in old_pages if rel_path not in pages)
+    index["pages"] = pages
+    return updated
+
+
+def refresh_index(dir_path_content, path):
+    index = load_index(path)
+    updated = update_index(index, dir_path_content)
+    if updated or not os.path.exists(path):
+        save_index(path, index)
+    return index, updated
+
+
+def published(index, section=None):
+    # Entries outside drafts, optionally only those under content/<section>/.
+    prefix = None if section is None else section.strip("/") + "/"
+    for rel_path, entry in sorted(index["pages"].items()):
+        if entry["meta"]["draft"]:
+            continue
+        if prefix is not None and not rel_path.replace(os.sep, "/").startswith(prefix):
+            continue
+        yield rel_path, entry
+
+
+def draft_sources(index, dir_path_content):
+    # Source paths of drafts, in the form list_sources gives them.
+    return {os.path.join(dir_path_content, rel_path) for rel_path, entry in index["pages"].items() if entry["meta"]["draft"]}
+
+
+def pages_by_date(index, section=None):
+    # Newest first; undated pages are left out since they cannot be ordered.
+    dated = [(rel_path, entry) for rel_path, entry in published(index, section) if entry["meta"]["date"]]
+    return sorted(dated, key=lambda item: (item[1]["meta"]["date"], item[0]), reverse=True)
+
+
+def pages_with_tag(index, tag):
+    return [(rel_path, entry) for rel_path, entry in published(index) if tag in entry["meta"]["tags"]]
+
+
+def all_tags(index):
+    counts = {}
+    for _, entry in published(index):
+        for tag in entry["meta"]["tags"]:
+            counts[tag] = counts.get(tag, 0) + 1
+    return dict(sorted(counts.items()))
@@ -0,0 +1,75 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Runs items through read -> render -> write stages joined by bounded queues.
+# Reads and writes are blocking file I/O on a thread pool; rendering runs on
+# the executor the caller passes. A full queue stalls the stage feeding it, so
+# at most queue_size items wait between any two stages.
+
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+async def _stage(inbox, outbox, workers, run):
+    async def worker():
+        while True:
+            entry = await inbox.get()
+            if entry is _DONE:
+                # Put it back so the other workers of this stage stop too.
+                await inbox.put(_DONE)
+                return
+            index, value, error = entry
+            if error is None:
+                try:
+                    value = await run(value)
+                except Exception as e:
+                    error = e
+            await outbox.put((index, value, error))
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await outbox.put(_DONE)
+
+
+async def _run(items, read, render, write, render_executor, readers, renderers, writers, queue_size):
+    loop = asyncio.get_running_loop()
+    pending = asyncio.Queue(queue_size)
+    read_done = asyncio.Queue(queue_size)
+    render_done = asyncio.Queue(queue_size)
+    write_done = asyncio.Queue(queue_size)
+    results = [None] * len(items)
+
+    with ThreadPoolExecutor(max_workers=readers + writers) as io_executor:
+        def on(executor, func):
+            async def run(value):
+                return await loop.run_in_executor(executor, func, value)
+            return run
+
+        async def feed():
+            for index, item in enumerate(items):
+                await pending.put((index, item, None))
+            await pending.put(_DONE)
+
+        async def collect():
+            while True:
+                entry = await write_done.get()
+                if entry is _DONE:
+                    return
+                index, value, error = entry
+                results[index] = (value, error)
+
+        await asyncio.gather(
+            feed(),
+            _stage(pending, read_done, readers, on(io_executor, read)),
+            _stage(read_done, render_done, renderers, on(render_executor, render)),
+            _stage(render_done, write_done, writers, on(io_executor, write)),
+            collect(),
+        )
+    return results
+
+
+def run_pipeline(items, read, render, write, render_executor, readers=4, renderers=1, writers=4, queue_size=DEFAULT_QUEUE_SIZE):
+    # Returns (value, error) per item in input order. value is what write
+    # returned, or the input of the stage that raised error; later stages are
+    # skipped for that item.
+    return asyncio.run(_run(list(items), read, render, write, render_executor, readers, renderers, writers, queue_size))
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+PAGE_STAGES = ("read", "block split", "inline parse", "serialize", "template fill", "write")
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    @contextmanager
+    def stage(self, page, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.events.append({
+                "page": page,
+                "stage": name,
+                "start": start,
+                "duration": time.perf_counter_ns() - start,
+                "pid": os.getpid(),
+            })
+
+    def merge(self, events):
+        self.events.extend(events)
+
+    def page_totals(self):
+        totals = {}
+        for event in self.events:
+            stages = totals.setdefault(event["page"], {})
+            stages[event["stage"]] = stages.get(event["stage"], 0) + event["duration"]
+        return totals
+
+    def summary(self, limit=10):
+        totals = self.page_totals()
+        slowest = sorted(totals.items(), key=lambda item: sum(item[1].values()), reverse=True)[:limit]
+        width = max([len("page")] + [len(page) for page, _ in slowest])
+        header = f"{'page':<{width}}  {'total':>9}" + "".join(f"  {stage:>13}" for stage in PAGE_STAGES)
+        lines = [f"Slowest {len(slowest)} of {len(totals)} page(s), times in ms", header, "-" * len(header)]
+        for page, stages in slowest:
+            row = f"{page:<{width}}  {sum(stages.values()) / 1e6:>9.3f}"
+            row += "".join(f"  {stages.get(stage, 0) / 1e6:>13.3f}" for stage in PAGE_STAGES)
+            lines.append(row)
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        # Chrome trace-event format; open in chrome://tracing or ui.perfetto.dev.
+        origin = min((event["start"] for event in self.events), default=0)
+        trace_events = [
+            {
+                "name": event["stage"],
+                "cat": "page",
+                "ph": "X",
+                "ts": (event["start"] - origin) / 1000,
+                "dur": event["duration"] / 1000,
+                "pid": event["pid"],
+                "tid": event["pid"],
+                "args": {"page": event["page"]},
+            }
+            for event in self.events
+        ]
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+
+class NullProfiler:
+    enabled = False
+
+    def stage(self, page, name):
+        return nullcontext()
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,192 @@
+import html
+import os
+import re
+import shutil
+from htmlnode import ParentNode
+from manifest import load_json_state, save_json_state
+from metadata import parse_front_matter, published
+from textnode import BlockType, block_to_html_node, scan_blocks
+
+# A prebuilt inverted index for client-side search, written under
+# docs/search/: pages.json maps document ids to [url, title], and each shard
+# holds the terms starting with one prefix as {term: [[id, count], ...]}, so
+# a query only fetches the shards of its own terms.
+
+SEARCH_VERSION = 1
+SEARCH_DIR = "search"
+PAGES_FILE = "pages.json"
+PREFIX_LENGTH = 2
+# Shipped to browsers, so written without whitespace.
+JSON_SEPARATORS = (",", ":")
+MIN_TERM_LENGTH = 2
+CODE_TAGS = ("pre", "code")
+TERM = re.compile(r"\w+")
+TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+CODE_ELEMENT = re.compile(r"<(pre|code)\b.*?</\1>", re.DOTALL)
+
+
+def state_path_for(dest_dir):
+    return os.path.normpath(dest_dir) + ".search.json"
+
+
+def new_state(skip_code=False):
+    return {"version": SEARCH_VERSION, "skip_code": skip_code, "next_id": 0, "pages": {}}
+
+
+def load_state(path, skip_code=False):
+    # A state built with other settings is discarded so every page is re-read.
+    state = load_json_state(path, SEARCH_VERSION, lambda: new_state(skip_code))
+    if state.get("skip_code") != skip_code:
+        return new_state(skip_code)
+    return state
+
+
+def save_state(path, state):
+    save_json_state(path, state)
+
+
+def node_text(node, skip_code=False):
+    # Leaf values of the tree. Cached blocks are already-serialized strings,
+    # so their tags are stripped instead.
+    stack = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            if skip_code:
+                item = CODE_ELEMENT.sub(" ", item)
+            yield html.unescape(TAG.sub(" ", item))
+        elif skip_code and item.tag in CODE_TAGS:
+            continue
+        elif isinstance(item, ParentNode):
+            stack.extend(reversed(item.children))
+        elif item.value:
+            yield item.value
+
+
+def count_terms(fragments):
+    counts = {}
+    for text in fragments:
+        for term in TERM.findall(text.lower()):
+            if len(term) >= MIN_TERM_LENGTH:
+                counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def page_terms(tree, skip_code=False):
+    return count_terms(node_text(tree, skip_code))
+
+
+def source_terms(source, skip_code=False):
+    # For pages the build did not render this time, e.g. when search is
+    # first turned on.
+    with open(source, 'r') as f:
+        _, body = parse_front_matter(f)
+        return count_terms(
+            fragment
+            for block, block_type in scan_blocks(body)
+            if not (skip_code and block_type == BlockType.CODE)
+            for fragment in node_text(block_to_html_node(block, block_type), skip_code)
+        )
+
+
+def shard_for(term):
+    prefix = term[:PREFIX_LENGTH]
+    return prefix if prefix.isascii() and prefix.isalnum() else "_"
+
+
+def changed_shards(old_terms, new_terms):
+    return {
+        shard_for(term)
+        for term in old_terms.keys() | new_terms.keys()
+        if old_terms.get(term) != new_terms.get(term)
+    }
+
+
+def update_state(state, index, dir_path_content, rendered=None):
+    # rendered maps content-relative paths to terms taken from trees the build
+    # already had. Other published pages are re-read only when their size or
+    # mtime moved. Returns the shards whose postings changed and whether the
+    # page list did.
+    rendered = rendered or {}
+    old_pages = state["pages"]
+    pages = {}
+    shards = set()
+    listing_changed = False
+    for rel_path, entry in published(index):
+        previous = old_pages.get(rel_path)
+        if rel_path not in rendered and previous is not None and previous["size"] == entry["size"] and previous["mtime"] == entry["mtime"]:
+            pages[rel_path] = previous
+            continue
+        if rel_path in rendered:
+            terms = rendered[rel_path]
+        else:
+            terms = source_terms(os.path.join(dir_path_content, rel_path), state["skip_code"])
+        if previous is None:
+            page_id = state["next_id"]
+            state["next_id"] += 1
+        else:
+            page_id = previous["id"]
+        pages[rel_path] = {
+            "id": page_id,
+            "size": entry["size"],
+            "mtime": entry["mtime"],
+            "url": entry["url"],
+            "title": entry["meta"]["title"],
+            "terms": terms,
+        }
+        shards |= changed_shards(previous["terms"] if previous else {}, terms)
+        if previous is None or (previous["url"], previous["title"]) != (entry["url"], entry["meta"]["title"]):
+            listing_changed = True
+    for rel_path, previous in old_pages.items():
+        if rel_path not in pages:
+            shards |= changed_shards(previous["terms"], {})
+            listing_changed = True
+    state["pages"] = pages
+    return shards, listing_changed
+
+
+def build_shards(state, shards):
+    # One pass over every page's terms fills all the requested shards.
+    postings = {shard: {} for shard in shards}
+    for entry in state["pages"].values():
+        for term, count in entry["terms"].items():
+            shard = postings.get(shard_for(term))
+            if shard is not None:
+                shard.setdefault(term, []).append([entry["id"], count])
+    for shard in postings.values():
+        for term in shard:
+            shard[term].sort(key=lambda posting: (-posting[1], posting[0]))
+    return postings
+
+
+def all_shards(state):
+    return {shard_for(term) for entry in state["pages"].values() for term in entry["terms"]}
+
+
+def write_search_files(dest_dir_path, state, shards, listing_changed=True):
+    # Writes the given shards, removing those that came out empty. An output
+    # without a page list yet gets every shard.
+    search_dir = os.path.join(dest_dir_path, SEARCH_DIR)
+    if not os.path.exists(os.path.join(search_dir, PAGES_FILE)):
+        shards = set(shards) | all_shards(state)
+        listing_changed = True
+    os.makedirs(search_dir, exist_ok=True)
+    written = 0
+    for shard, postings in build_shards(state, shards).items():
+        path = os.path.join(search_dir, f"{shard}.json")
+        if postings:
+            save_json_state(path, postings, separators=JSON_SEPARATORS)
+            written += 1
+        elif os.path.exists(path):
+            os.remove(path)
+    if listing_changed:
+        pages = {str(entry["id"]): [entry["url"], entry["title"]] for entry in state["pages"].values()}
+        save_json_state(os.path.join(search_dir, PAGES_FILE), {"prefix": PREFIX_LENGTH, "pages": pages}, separators=JSON_SEPARATORS)
+    return written
+
+
+def remove_search_files(dest_dir_path):
+    search_dir = os.path.join(dest_dir_path, SEARCH_DIR)
+    if os.path.isdir(search_dir):
+        shutil.rmtree(search_dir)
+        print(f"Removed search index: {search_dir}")
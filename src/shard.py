@@ -0,0 +1,111 @@
+import hashlib
+import heapq
+import os
+from assets import list_files, place_file
+
+# Splitting one build across N independent processes or machines. Every shard
+# discovers the same pages and computes the same partition, so shards never
+# talk to each other; each renders its share into its own directory, and a
+# merge checks the shards' manifests against the site before combining them.
+
+
+def parse_shard(text):
+    index, sep, count = text.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {text!r}")
+    if not sep or not 1 <= index <= count:
+        raise ValueError(f"Shard must be i/N with 1 <= i <= N, got {text!r}")
+    return index, count
+
+
+def shard_dir_for(dest_dir, index, count):
+    return f"{os.path.normpath(dest_dir)}.shard-{index}-of-{count}"
+
+
+def path_hash(source):
+    return hashlib.sha256(source.replace(os.sep, "/").encode()).hexdigest()
+
+
+def partition(sizes, count):
+    # sizes maps each source to its size in bytes. Largest pages go first,
+    # each to the shard with the fewest bytes so far (the lower shard on a
+    # tie); pages of equal size are ordered by path hash so the split does
+    # not depend on discovery order.
+    loads = [(0, index) for index in range(count)]
+    shards = [[] for _ in range(count)]
+    for source in sorted(sizes, key=lambda source: (-sizes[source], path_hash(source))):
+        load, index = heapq.heappop(loads)
+        shards[index].append(source)
+        heapq.heappush(loads, (load + max(sizes[source], 1), index))
+    return [sorted(sources) for sources in shards]
+
+
+def site_digest(sources):
+    digest = hashlib.sha256()
+    for source in sorted(source.replace(os.sep, "/") for source in sources):
+        digest.update(source.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def shard_record(index, count, assigned, sources):
+    # Stored in the shard's manifest for the merge to check.
+    return {"index": index, "count": count, "site": site_digest(sources), "pages": sorted(assigned)}
+
+
+SETTINGS = ("template", "basepath", "asset_map", "minify")
+
+
+def check_shards(manifests, count, sources):
+    # manifests maps shard index to that shard's manifest, or None when it has
+    # no manifest. Returns every reason the shards cannot be merged into the
+    # site made of sources; an empty list means they cover it exactly once.
+    problems = []
+    site = site_digest(sources)
+    owners = {}
+    built = {index: manifest for index, manifest in manifests.items() if manifest and manifest.get("shard")}
+    for index in range(1, count + 1):
+        if index not in built:
+            problems.append(f"shard {index}/{count} has not been built")
+            continue
+        manifest = built[index]
+        record = manifest["shard"]
+        if (record["index"], record["count"]) != (index, count):
+            problems.append(f"shard {index}/{count} holds shard {record['index']}/{record['count']}")
+        if record["site"] != site:
+            problems.append(f"shard {index}/{count} was built from a different set of pages")
+        for source in record["pages"]:
+            if source in owners:
+                problems.append(f"{source} is in shards {owners[source]} and {index}")
+                continue
+            owners[source] = index
+            entry = manifest["pages"].get(source)
+            if entry is None:
+                problems.append(f"{source} failed to build in shard {index}/{count}")
+            elif not os.path.exists(entry["output"]):
+                problems.append(f"{source} is missing from shard {index}/{count}: {entry['output']}")
+    settings = {tuple(manifest.get(key) for key in SETTINGS) for manifest in built.values()}
+    if len(settings) > 1:
+        problems.append("shards were built with different templates, basepaths or options")
+    if len(built) == count:
+        problems.extend(f"{source} is in no shard" for source in sorted(sources) if source not in owners)
+    return problems
+
+
+def link_outputs(shard_dir, dest_dir, placed):
+    # Hardlinks (or copies) every file of a shard into dest_dir, skipping
+    # paths an earlier shard already placed and files that are already the
+    # same inode. Adds what it placed to placed and returns how many it linked.
+    linked = 0
+    for rel_path in list_files(shard_dir):
+        if rel_path in placed:
+            continue
+        placed.add(rel_path)
+        source_path = os.path.join(shard_dir, rel_path)
+        destination_path = os.path.join(dest_dir, rel_path)
+        if os.path.exists(destination_path) and os.path.samefile(source_path, destination_path):
+            continue
+        place_file(source_path, destination_path, "hardlink")
+        linked += 1
+    return linked
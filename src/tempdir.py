@@ -0,0 +1,22 @@
+import os
+import tempfile
+import unittest
+
+
+class TempDirTestCase(unittest.TestCase):
+    # Gives each test a fresh directory, self.root. write() takes paths
+    # relative to self.write_dir, which starts out as the root.
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write_dir = self.root
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, content):
+        path = os.path.join(self.write_dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
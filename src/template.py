@@ -0,0 +1,120 @@
+import os
+import re
+from htmlnode import PRESERVE_WHITESPACE, WHITESPACE, url_resolver
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTE = re.compile(r'\b(href|src)="([^"]*)"')
+TEMPLATE_SLOTS = ("Title", "Content")
+PRESERVED_ELEMENT = re.compile(
+    r"(<(%s)\b.*?</\2\s*>)" % "|".join(PRESERVE_WHITESPACE), re.DOTALL | re.IGNORECASE
+)
+TAG = re.compile(r"(<[^>]*>)")
+TAG_NAME = re.compile(r"<[/!]?(\w+)")
+# Whitespace next to these is layout only. Between inline elements it still
+# separates words, so there it is collapsed to one space rather than dropped.
+BLOCK_ELEMENTS = frozenset(
+    "doctype html head body title meta link base script style div p pre ul ol li dl dt dd "
+    "article section header footer nav main aside h1 h2 h3 h4 h5 h6 blockquote figure "
+    "figcaption table thead tbody tfoot tr td th form hr br".split()
+)
+
+_template_cache = {}
+
+
+class Template:
+    def __init__(self, segments, slots):
+        if len(segments) != len(slots) + 1:
+            raise ValueError("Template needs exactly one more segment than slots.")
+        self.segments = segments
+        self.slots = slots
+
+    def render(self, values):
+        return "".join(self.iter_render(values))
+
+    def iter_render(self, values):
+        # A slot value is either a string or a callable returning an iterable of
+        # fragments, called once per occurrence so it can be streamed.
+        yield self.segments[0]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values[slot]
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value()
+            yield segment
+
+    def write(self, stream, values):
+        stream.writelines(self.iter_render(values))
+
+    def __repr__(self):
+        return f"Template(segments={len(self.segments)}, slots={self.slots!r})"
+
+
+def rewrite_urls(html, resolve_url):
+    if resolve_url is None:
+        return html
+    return URL_ATTRIBUTE.sub(lambda match: f'{match.group(1)}="{resolve_url(match.group(2))}"', html)
+
+
+def _is_block(tag):
+    match = TAG_NAME.match(tag) if tag else None
+    return tag is None or (match is not None and match.group(1).lower() in BLOCK_ELEMENTS)
+
+
+def minify_html(html):
+    # split() yields text, element, tag name, text, ...; elements such as
+    # <pre> are kept as written and only the text around them is touched.
+    parts = PRESERVED_ELEMENT.split(html)
+    del parts[2::3]
+    for i in range(0, len(parts), 2):
+        tokens = TAG.split(parts[i])
+        for j in range(0, len(tokens), 2):
+            before = tokens[j - 1] if j else (parts[i - 1] if i else None)
+            after = tokens[j + 1] if j + 1 < len(tokens) else (parts[i + 1] if i + 1 < len(parts) else None)
+            text = WHITESPACE.sub(" ", tokens[j])
+            if _is_block(before):
+                text = text.lstrip()
+            if _is_block(after):
+                text = text.rstrip()
+            tokens[j] = text
+        parts[i] = "".join(tokens)
+    return "".join(parts)
+
+
+def compile_template(template_content, basepath="/", slots=TEMPLATE_SLOTS, assets=None, minify=False):
+    # The template's own href/src attributes are resolved here, once, and with
+    # minify its whitespace is collapsed here too rather than on every page.
+    if minify:
+        template_content = minify_html(template_content)
+    resolve = url_resolver(basepath, assets)
+    segments = []
+    found = []
+    position = 0
+    for match in SLOT_PATTERN.finditer(template_content):
+        segments.append(rewrite_urls(template_content[position:match.start()], resolve))
+        found.append(match.group(1))
+        position = match.end()
+    segments.append(rewrite_urls(template_content[position:], resolve))
+    
+    missing = [slot for slot in slots if slot not in found]
+    if missing:
+        raise ValueError(f"Template is missing slot(s): {', '.join(missing)}")
+    unknown = [slot for slot in found if slot not in slots]
+    if unknown:
+        raise ValueError(f"Template has unknown slot(s): {', '.join(unknown)}")
+    return Template(tuple(segments), tuple(found))
+
+
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    # Compiled once per template file, basepath, asset map (a tuple of pairs)
+    # and minify setting; recompiled only if the file changes.
+    stat = os.stat(template_path)
+    key = (os.path.abspath(template_path), basepath, assets, minify)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with open(template_path, 'r') as f:
+        template = compile_template(f.read(), basepath, assets=assets, minify=minify)
+    _template_cache[key] = (version, template)
+    return template
@@ -0,0 +1,107 @@
+import os
+import unittest
+from unittest import mock
+from assets import is_synced, list_files, place_file, sync_files, sync_static
+from manifest import new_manifest, save_manifest
+from tempdir import TempDirTestCase
+
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+        self.write(os.path.join(self.source, "images", "a.png"), "png-a")
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_list_files(self):
+        self.assertEqual(list_files(self.source), ["index.css", os.path.join("images", "a.png")])
+
+    def test_first_sync_copies_everything(self):
+        assets, stats = sync_files(self.source, self.dest)
+        self.assertEqual(stats, {"copied": 2, "unchanged": 0, "removed": 0})
+        self.assertEqual(self.read(os.path.join(self.dest, "images", "a.png")), "png-a")
+        self.assertEqual(sorted(assets), [os.path.join("images", "a.png"), "index.css"])
+
+    def test_second_sync_copies_nothing(self):
+        assets, _ = sync_files(self.source, self.dest)
+        with mock.patch("assets.place_file") as place:
+            _, stats = sync_files(self.source, self.dest, assets)
+        place.assert_not_called()
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_changed_file_is_copied(self):
+        assets, _ = sync_files(self.source, self.dest)
+        self.write(os.path.join(self.source, "index.css"), "body { color: red; }")
+        _, stats = sync_files(self.source, self.dest, assets)
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body { color: red; }")
+
+    def test_orphans_removed_but_generated_pages_kept(self):
+        assets, _ = sync_files(self.source, self.dest)
+        self.write(os.path.join(self.dest, "index.html"), "<p>page</p>")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        _, stats = sync_files(self.source, self.dest, assets)
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_checksum_detects_same_size_edit(self):
+        assets, _ = sync_files(self.source, self.dest)
+        dest_css = os.path.join(self.dest, "index.css")
+        self.write(dest_css, "XXXX {}")
+        source_stat = os.stat(os.path.join(self.source, "index.css"))
+        os.utime(dest_css, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        self.assertTrue(is_synced(os.path.join(self.source, "index.css"), dest_css))
+        self.assertFalse(is_synced(os.path.join(self.source, "index.css"), dest_css, checksum=True))
+
+    def test_hardlink_mode(self):
+        sync_files(self.source, self.dest, link_mode="hardlink")
+        self.assertTrue(os.path.samefile(os.path.join(self.source, "index.css"), os.path.join(self.dest, "index.css")))
+
+    def test_reflink_falls_back_to_copy(self):
+        place_file(os.path.join(self.source, "index.css"), os.path.join(self.dest, "index.css"), "reflink")
+        self.assertEqual(self.read(os.path.join(self.dest, "index.css")), "body {}")
+
+    def test_origin_links_to_synced_copy(self):
+        sync_files(self.source, self.dest)
+        mirror = os.path.join(self.root, "mirror")
+        assets, stats = sync_files(self.source, mirror, link_mode="hardlink", origin=self.dest)
+        self.assertEqual(stats["copied"], 2)
+        self.assertTrue(os.path.samefile(os.path.join(self.dest, "index.css"), os.path.join(mirror, "index.css")))
+        _, stats = sync_files(self.source, mirror, assets, link_mode="hardlink", origin=self.dest)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_unknown_link_mode(self):
+        with self.assertRaises(ValueError):
+            sync_files(self.source, self.dest, link_mode="symlink")
+
+    def test_sync_static_records_assets_in_manifest(self):
+        manifest_path = os.path.join(self.root, "docs.manifest.json")
+        sync_static(self.source, self.dest, manifest_path)
+        os.remove(os.path.join(self.source, "index.css"))
+        stats = sync_static(self.source, self.dest, manifest_path)
+        self.assertEqual(stats["removed"], 1)
+
+
+    def test_first_sync_clears_untracked_files(self):
+        manifest_path = os.path.join(self.root, "docs.manifest.json")
+        save_manifest(manifest_path, dict(new_manifest(), pages={"a.md": {"output": os.path.join(self.dest, "a.html")}}))
+        self.write(os.path.join(self.dest, "a.html"), "<p>page</p>")
+        self.write(os.path.join(self.dest, "old", "tolkien.pngZone.Identifier"), "junk")
+        with mock.patch("builtins.print"):
+            stats = sync_static(self.source, self.dest, manifest_path)
+            self.assertEqual(stats["removed"], 1)
+            self.assertEqual(sorted(list_files(self.dest)), ["a.html", os.path.join("images", "a.png"), "index.css"])
+            # Later syncs know what they placed and leave other files alone.
+            self.write(os.path.join(self.dest, "notes.txt"), "mine")
+            self.assertEqual(sync_static(self.source, self.dest, manifest_path)["removed"], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "notes.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
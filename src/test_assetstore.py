@@ -0,0 +1,66 @@
+import os
+import unittest
+from unittest import mock
+from assets import sync_files
+from manifest import hashed_entry
+from assetstore import dedup_stats, object_path, prune_store, store_file, store_path_for
+from tempdir import TempDirTestCase
+
+
+class TestAssetStore(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "docs")
+        self.store = os.path.join(self.root, "docs.assetstore")
+        self.write(os.path.join(self.source, "tolkien.png"), "same bytes")
+        self.write(os.path.join(self.source, "images", "tolkien.png"), "same bytes")
+        self.write(os.path.join(self.source, "index.css"), "body {}")
+
+    def sync(self, previous=None):
+        with mock.patch("builtins.print"):
+            return sync_files(self.source, self.dest, previous, link_mode="store", store=self.store)
+
+    def test_store_path_beside_output(self):
+        self.assertEqual(store_path_for("docs/"), "docs.assetstore")
+
+    def test_identical_files_stored_once(self):
+        with mock.patch("assetstore.shutil.copy2", wraps=__import__("shutil").copy2) as copied:
+            assets, stats = self.sync()
+        self.assertEqual(copied.call_count, 2)
+        self.assertEqual(stats["copied"], 3)
+        self.assertTrue(os.path.samefile(os.path.join(self.dest, "tolkien.png"), os.path.join(self.dest, "images", "tolkien.png")))
+        self.assertEqual(dedup_stats([assets]), {"objects": 2, "stored": 17, "saved": 10})
+
+    def test_resync_does_not_rehash_or_relink(self):
+        assets, _ = self.sync()
+        with mock.patch("manifest.file_hash") as hashed, mock.patch("assets.place_file") as placed:
+            _, stats = self.sync(assets)
+        hashed.assert_not_called()
+        placed.assert_not_called()
+        self.assertEqual(stats["unchanged"], 3)
+
+    def test_savings_across_outputs(self):
+        assets, _ = self.sync()
+        self.assertEqual(dedup_stats([assets, assets])["saved"], 10 + 27)
+
+    def test_store_file_reuses_existing_object(self):
+        path = os.path.join(self.source, "index.css")
+        digest = hashed_entry(path)["hash"]
+        self.assertEqual(store_file(self.store, path, digest), (object_path(self.store, digest), True))
+        self.assertEqual(store_file(self.store, path, digest), (object_path(self.store, digest), False))
+
+    def test_prune_unreferenced_objects(self):
+        assets, _ = self.sync()
+        css = assets["index.css"]["hash"]
+        self.assertEqual(prune_store(self.store, {css}), 1)
+        self.assertTrue(os.path.exists(object_path(self.store, css)))
+        self.assertEqual(sorted(os.listdir(self.store)), [css[:2]])
+
+    def test_store_mode_needs_a_store(self):
+        with self.assertRaises(ValueError):
+            sync_files(self.source, self.dest, link_mode="store")
+
+
+if __name__ == "__main__":
+    unittest.main()
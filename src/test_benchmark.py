@@ -0,0 +1,57 @@
+import os
+import random
+import unittest
+from benchmark import clear_work_dir, compare, generate_site, page_path, run_benchmark, synthetic_page
+from textnode import markdown_to_html_node
+from tempdir import TempDirTestCase
+
+PARAMS = {
+    "pages": 6,
+    "paragraphs": 10,
+    "links": 2,
+    "images": 1,
+    "code_blocks": 1,
+    "depth": 2,
+    "static_files": 3,
+    "static_size": 128,
+    "seed": 7,
+}
+
+
+class TestBenchmark(TempDirTestCase):
+    def test_synthetic_page_is_deterministic_and_valid(self):
+        first = synthetic_page(random.Random(3), 0, PARAMS)
+        second = synthetic_page(random.Random(3), 0, PARAMS)
+        self.assertEqual(first, second)
+        self.assertIn("<a href=", markdown_to_html_node(first).to_html())
+
+    def test_page_path_depth(self):
+        self.assertEqual(page_path(9, 2), os.path.join("section1", "section1", "page9", "index.md"))
+
+    def test_generate_site(self):
+        content, static, template_path = generate_site(self.root, PARAMS)
+        pages = [name for _, _, names in os.walk(content) for name in names]
+        self.assertEqual(len(pages), PARAMS["pages"])
+        self.assertEqual(len(os.listdir(os.path.join(static, "images"))), PARAMS["static_files"])
+        self.assertTrue(os.path.exists(template_path))
+
+    def test_clear_work_dir_keeps_other_files(self):
+        run_benchmark(PARAMS, self.root)
+        self.write("notes.txt", "keep me")
+        clear_work_dir(self.root)
+        self.assertEqual(os.listdir(self.root), ["notes.txt"])
+
+    def test_run_benchmark_reports_every_stage(self):
+        result = run_benchmark(PARAMS, self.root)
+        self.assertEqual(result["pages"], PARAMS["pages"])
+        for stage in ("read", "markdown_to_blocks", "block_to_block_type", "text_to_textnodes",
+                      "to_html", "template_fill", "write", "static_sync_cold", "full_build"):
+            self.assertIn(stage, result["stages"])
+
+    def test_compare(self):
+        ratios = compare({"stages": {"read": 2.0, "write": 1.0}}, {"stages": {"read": 1.0}})
+        self.assertEqual(ratios, {"read": 2.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
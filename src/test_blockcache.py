@@ -0,0 +1,78 @@
+import os
+import time
+import unittest
+from blockcache import BlockCache, cache_path_for, close_block_cache, format_stats, open_block_cache
+from textnode import BlockType
+from tempdir import TempDirTestCase
+
+
+class TestBlockCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.root, "docs.blockcache.sqlite")
+        self.cache = BlockCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        super().tearDown()
+
+    def test_cache_path_beside_output(self):
+        self.assertEqual(cache_path_for("docs/"), "docs.blockcache.sqlite")
+
+    def test_miss_then_hit(self):
+        key = BlockCache.key("Hello", BlockType.PARAGRAPH)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<p>Hello</p>")
+        self.assertEqual(self.cache.get(key), "<p>Hello</p>")
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_block_type(self):
+        self.assertNotEqual(
+            BlockCache.key("- a", BlockType.PARAGRAPH),
+            BlockCache.key("- a", BlockType.UNORDERED_LIST),
+        )
+
+    def test_key_depends_on_basepath(self):
+        self.assertNotEqual(
+            BlockCache.key("[a](/a)", BlockType.PARAGRAPH, "/"),
+            BlockCache.key("[a](/a)", BlockType.PARAGRAPH, "/site/"),
+        )
+
+    def test_persists_between_builds(self):
+        key = BlockCache.key("Hello", BlockType.PARAGRAPH)
+        self.cache.put(key, "<p>Hello</p>")
+        self.cache.close()
+        self.cache = BlockCache(self.path)
+        self.assertEqual(self.cache.get(key), "<p>Hello</p>")
+
+    def test_evicts_least_recently_used(self):
+        keys = [BlockCache.key(f"block {i}", BlockType.PARAGRAPH) for i in range(3)]
+        for key in keys:
+            self.cache.put(key, "x" * 100)
+            time.sleep(0.001)
+        self.cache.get(keys[0])
+        self.assertEqual(self.cache.evict(max_bytes=200), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_no_eviction_under_cap(self):
+        self.cache.put(BlockCache.key("a", BlockType.PARAGRAPH), "<p>a</p>")
+        self.assertEqual(self.cache.evict(max_bytes=1024), 0)
+
+    def test_stats(self):
+        self.cache.put(BlockCache.key("a", BlockType.PARAGRAPH), "<p>a</p>")
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (1, 8))
+        self.assertIn("50.0% hit rate", format_stats(1, 1, stats))
+
+    def test_open_block_cache_reuses_connection(self):
+        first = open_block_cache(self.path)
+        self.assertIs(first, open_block_cache(self.path))
+        close_block_cache(self.path)
+        self.assertIsNot(first, open_block_cache(self.path))
+        close_block_cache(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import gzip
+import json
+import os
+import unittest
+from unittest import mock
+from compress import compress_outputs, gzip_file, remove_compressed
+from tempdir import TempDirTestCase
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = os.path.join(self.root, "docs")
+        self.write_dir = self.dest
+        self.manifest = os.path.join(self.root, "docs.manifest.json")
+        self.write("index.html", "<p>hello</p>" * 200)
+        self.write("index.css", "body {}" * 300)
+        self.write("small.html", "<p>tiny</p>")
+        self.write(os.path.join("images", "a.png"), "x" * 5000)
+
+    def compress(self):
+        with mock.patch("builtins.print"):
+            return compress_outputs(self.dest, self.manifest, jobs=2, min_size=1024)
+
+    def test_text_outputs_above_threshold(self):
+        stats = self.compress()
+        self.assertEqual(stats["compressed"], 2)
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), 'rt') as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png.gz")))
+
+    def test_sidecar_is_deterministic(self):
+        path = os.path.join(self.dest, "index.css")
+        gzip_file(path)
+        with open(path + ".gz", 'rb') as f:
+            first = f.read()
+        gzip_file(path)
+        with open(path + ".gz", 'rb') as f:
+            self.assertEqual(f.read(), first)
+
+    def test_unchanged_content_is_skipped(self):
+        self.compress()
+        # Rewritten with the same bytes: re-hashed but not recompressed.
+        self.write("index.html", "<p>hello</p>" * 200)
+        with mock.patch("compress.gzip_file") as compress:
+            stats = self.compress()
+        compress.assert_not_called()
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_changed_and_removed_outputs(self):
+        self.compress()
+        self.write("index.css", "main {}" * 300)
+        os.remove(os.path.join(self.dest, "index.html"))
+        stats = self.compress()
+        self.assertEqual((stats["compressed"], stats["removed"]), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+
+    def test_turning_gzip_off_removes_sidecars(self):
+        self.compress()
+        with mock.patch("builtins.print"):
+            self.assertEqual(remove_compressed(self.dest, self.manifest), 2)
+            self.assertEqual(remove_compressed(self.dest, self.manifest), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.css.gz")))
+        with open(self.manifest) as f:
+            self.assertNotIn("compressed", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
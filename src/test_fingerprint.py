@@ -0,0 +1,60 @@
+import json
+import os
+import unittest
+from unittest import mock
+from fingerprint import asset_map, asset_map_digest, fingerprint_assets, fingerprinted_path, write_asset_manifest
+from tempdir import TempDirTestCase
+
+
+class TestFingerprintAssets(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = self.root
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "png-a")
+        self.assets = {"index.css": {}, os.path.join("images", "a.png"): {}}
+
+    def fingerprint(self, previous=None):
+        with mock.patch("builtins.print"):
+            return fingerprint_assets(self.dest, self.assets, previous)
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("css/index.css", "3f2a9c1e77"), "css/index.3f2a9c1e.css")
+
+    def test_hashed_copy_beside_plain_name(self):
+        fingerprints, stats = self.fingerprint()
+        self.assertEqual(stats["hashed"], 2)
+        output = os.path.join(self.dest, fingerprints["index.css"]["output"])
+        self.assertTrue(os.path.samefile(output, os.path.join(self.dest, "index.css")))
+        urls = dict(asset_map(fingerprints))
+        self.assertEqual(urls["/images/a.png"], "/" + fingerprints[os.path.join("images", "a.png")]["output"])
+
+    def test_only_changed_assets_rehashed(self):
+        fingerprints, _ = self.fingerprint()
+        old_output = os.path.join(self.dest, fingerprints["index.css"]["output"])
+        os.remove(os.path.join(self.dest, "index.css"))
+        self.write("index.css", "main {}")
+        with mock.patch("fingerprint.file_hash", wraps=__import__("fingerprint").file_hash) as hashed:
+            updated, stats = self.fingerprint(fingerprints)
+        self.assertEqual([call.args[0] for call in hashed.call_args_list], [os.path.join(self.dest, "index.css")])
+        self.assertEqual((stats["hashed"], stats["unchanged"], stats["removed"]), (1, 1, 1))
+        self.assertFalse(os.path.exists(old_output))
+        self.assertNotEqual(asset_map_digest(asset_map(updated)), asset_map_digest(asset_map(fingerprints)))
+
+    def test_dropped_asset_removes_hashed_name(self):
+        fingerprints, _ = self.fingerprint()
+        del self.assets["index.css"]
+        self.fingerprint(fingerprints)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, fingerprints["index.css"]["output"])))
+
+    def test_write_asset_manifest(self):
+        write_asset_manifest(self.dest, (("/index.css", "/index.abc.css"),))
+        with open(os.path.join(self.dest, "asset-manifest.json")) as f:
+            self.assertEqual(json.load(f), {"/index.css": "/index.abc.css"})
+
+    def test_empty_map_has_no_digest(self):
+        self.assertIsNone(asset_map_digest(()))
+
+
+if __name__ == "__main__":
+    unittest.main()
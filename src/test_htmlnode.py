@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, url_resolver
 from textnode import TextNode, TextType, text_node_to_html_node
 
 
@@ -22,6 +23,37 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(repr(node), expected)
 
 
+class TestCompactNodes(unittest.TestCase):
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [LeafNode(None, "x")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_leaf_has_no_empty_containers(self):
+        node = LeafNode("b", "x")
+        self.assertIsNone(node._children)
+        self.assertIsNone(node._props)
+        self.assertEqual(node.children, [])
+        self.assertEqual(node.props, {})
+
+    def test_props_stored_as_tuple(self):
+        node = LeafNode("a", "x", {"href": "/a", "title": "t"})
+        self.assertEqual(node._props, (("href", "/a"), ("title", "t")))
+        self.assertEqual(node.props, {"href": "/a", "title": "t"})
+
+    def test_props_assignment(self):
+        node = LeafNode("a", "x", {"href": "/a"})
+        node.props = {"href": "/b"}
+        self.assertEqual(node.to_html(), '<a href="/b">x</a>')
+
+    def test_in_place_changes_fail_loudly(self):
+        node = LeafNode("a", "x", {"href": "/a"})
+        with self.assertRaises(TypeError):
+            node.props["href"] = "/b"
+        with self.assertRaises(TypeError):
+            node.children.append(LeafNode(None, "y"))
+        self.assertEqual(node.to_html(), '<a href="/a">x</a>')
+
+
 class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_p(self):
         node = LeafNode("p", "Hello, world!")
@@ -106,6 +138,92 @@ class TestParentNode(unittest.TestCase):
         )
 
 
+class TestStreamingHTML(unittest.TestCase):
+    def test_iter_html_fragments(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"})
+        self.assertEqual(list(node.iter_html()), ['<p class="x">', "<b>Bold</b>", " text", "</p>"])
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [ParentNode("ul", [LeafNode("li", "a"), LeafNode("li", "b")]), LeafNode("p", "c")])
+        self.assertEqual("".join(node.iter_html()), "<div><ul><li>a</li><li>b</li></ul><p>c</p></div>")
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode(None, "Nested")])])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<div><span>Nested</span></div>")
+
+    def test_leaf_write_html(self):
+        stream = io.StringIO()
+        LeafNode("i", "it").write_html(stream)
+        self.assertEqual(stream.getvalue(), "<i>it</i>")
+
+    def test_deep_tree_does_not_recurse(self):
+        node = LeafNode(None, "deep")
+        for _ in range(20000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 3))
+        self.assertEqual(len(html), len("deep") + 20000 * len("<span></span>"))
+
+    def test_invalid_child_raises_while_streaming(self):
+        child = ParentNode("span", [LeafNode(None, "x")])
+        child.children = []
+        with self.assertRaises(ValueError):
+            ParentNode("div", [child]).to_html()
+
+
+class TestResolveURLs(unittest.TestCase):
+    def test_root_basepath_has_no_resolver(self):
+        self.assertIsNone(url_resolver("/"))
+
+    def test_resolves_root_relative_only(self):
+        resolve = url_resolver("/site/")
+        self.assertEqual(resolve("/blog/"), "/site/blog/")
+        self.assertEqual(resolve("//cdn.example.com/a.js"), "//cdn.example.com/a.js")
+        self.assertEqual(resolve("https://example.com/"), "https://example.com/")
+        self.assertEqual(resolve("#top"), "#top")
+
+    def test_asset_map_then_basepath(self):
+        resolve = url_resolver("/site/", {"/index.css": "/index.abc.css"})
+        self.assertEqual(resolve("/index.css"), "/site/index.abc.css")
+        self.assertEqual(url_resolver("/", {"/a.png": "/a.1.png"})("/a.png"), "/a.1.png")
+
+    def test_only_url_props_are_resolved(self):
+        node = LeafNode("img", "", {"src": "/a.png", "alt": "/a.png"})
+        self.assertEqual(node.to_html(url_resolver("/site/")), '<img src="/site/a.png" alt="/a.png"></img>')
+
+    def test_text_content_is_not_rewritten(self):
+        node = ParentNode("div", [
+            ParentNode("pre", [LeafNode("code", 'href="/x"')]),
+            LeafNode("a", "link", {"href": "/x"}),
+        ])
+        self.assertEqual(
+            "".join(node.iter_html(url_resolver("/site/"))),
+            '<div><pre><code>href="/x"</code></pre><a href="/site/x">link</a></div>',
+        )
+
+
+class TestMinifiedHTML(unittest.TestCase):
+    def test_text_whitespace_collapsed(self):
+        node = ParentNode("blockquote", [LeafNode(None, "one\n  two"), LeafNode("b", "a   b")])
+        self.assertEqual(node.to_html(minify=True), "<blockquote>one two<b>a b</b></blockquote>")
+
+    def test_pre_and_code_kept_exact(self):
+        node = ParentNode("div", [
+            ParentNode("pre", [LeafNode("code", "a\n    b")]),
+            ParentNode("p", [LeafNode("code", "x  y"), LeafNode(None, "  z")]),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            "<div><pre><code>a\n    b</code></pre><p><code>x  y</code> z</p></div>",
+        )
+
+    def test_serialized_strings_emitted_as_is(self):
+        node = ParentNode("div", ["<pre>a\n  b</pre>"])
+        self.assertEqual(node.to_html(minify=True), "<div><pre>a\n  b</pre></div>")
+
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
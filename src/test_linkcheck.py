@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+from htmlnode import LeafNode, ParentNode, url_resolver
+from linkcheck import (
+    link_key,
+    load_state,
+    new_state,
+    orphan_pages,
+    output_keys,
+    page_links,
+    save_state,
+    state_path_for,
+    update_graph,
+)
+from metadata import new_index, update_index
+from tempdir import TempDirTestCase
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_links_and_images_from_nodes(self):
+        tree = ParentNode("p", [LeafNode("a", "Tom", {"href": "/blog/tom"}), LeafNode("img", "", {"src": "/a.png", "alt": "/b"})])
+        self.assertEqual(page_links(tree), ["/blog/tom", "/a.png"])
+
+    def test_cached_fragments_mapped_back(self):
+        assets = (("/index.css", "/index.abc.css"),)
+        html = LeafNode("a", "css", {"href": "/index.css"}).to_html(url_resolver("/site/", assets))
+        tree = ParentNode("div", [html, '<a href="https://example.com">x</a>'])
+        self.assertEqual(page_links(tree, "/site/", assets), ["/index.css", "https://example.com"])
+
+    def test_link_key(self):
+        self.assertEqual(link_key("/blog/tom/", "/"), "blog/tom")
+        self.assertEqual(link_key("/", "/blog/tom"), "")
+        self.assertEqual(link_key("../images/a%20b.png#top", "/blog/tom/x.html"), "blog/images/a b.png")
+        for url in ("https://example.com", "//cdn.example.com/a.js", "mailto:a@b.c", "#top"):
+            self.assertIsNone(link_key(url, "/"))
+
+    def test_output_keys(self):
+        keys = output_keys(["index.html", os.path.join("blog", "tom", "index.html"), "about.html"])
+        self.assertEqual(keys, {"index.html", "", "blog/tom/index.html", "blog/tom", "about.html"})
+
+
+class TestLinkGraph(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.write_dir = self.content
+        self.write("index.md", "# Home\n\n[Tom](/blog/tom) [Contact](/contact) ![pic](/images/a.png)")
+        self.write("blog/tom/index.md", "# Tom\n\n[Home](/)\n\n```\n[not a link](/missing)\n```")
+        self.write("lost.md", "# Lost\n\n[Tom](blog/tom)")
+        self.index = new_index()
+        update_index(self.index, self.content)
+        self.outputs = output_keys(["index.html", "blog/tom/index.html", "lost.html", "images/a.png"])
+
+    def test_broken_links_and_orphans(self):
+        state = new_state()
+        self.assertEqual(len(update_graph(state, self.index, self.content, self.outputs)), 3)
+        self.assertEqual(state["pages"]["index.md"]["broken"], ["/contact"])
+        self.assertEqual(state["pages"][os.path.join("blog", "tom", "index.md")]["broken"], [])
+        self.assertEqual(orphan_pages(state), ["lost.md"])
+        self.assertEqual(orphan_pages(state, listed={"lost.html"}), [])
+
+    def test_only_changed_pages_rechecked(self):
+        state = new_state()
+        update_graph(state, self.index, self.content, self.outputs)
+        rendered = {"lost.md": ["/nope"]}
+        with mock.patch("linkcheck.source_links", side_effect=AssertionError("source re-read")):
+            self.assertEqual(update_graph(state, self.index, self.content, self.outputs, rendered), {"lost.md"})
+        self.assertEqual(state["pages"]["lost.md"]["broken"], ["/nope"])
+
+    def test_new_output_rechecks_pages_linking_to_it(self):
+        state = new_state()
+        update_graph(state, self.index, self.content, self.outputs)
+        checked = update_graph(state, self.index, self.content, self.outputs | output_keys(["contact/index.html"]))
+        self.assertEqual(checked, {"index.md"})
+        self.assertEqual(state["pages"]["index.md"]["broken"], [])
+
+    def test_state_round_trip(self):
+        path = state_path_for(os.path.join(self.root, "docs"))
+        state = new_state()
+        update_graph(state, self.index, self.content, self.outputs)
+        save_state(path, state)
+        self.assertEqual(load_state(path), state)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from listings import (
+    atom_feed,
+    collection_pages,
+    collections_signature,
+    output_for_url,
+    paginate,
+    section_pages,
+    sitemap,
+    slugify,
+    tag_slugs,
+)
+
+
+def entry(url, title, date=None, tags=(), draft=False):
+    return {"size": 1, "mtime": 1, "url": url, "meta": {"title": title, "date": date, "tags": list(tags), "draft": draft}}
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.index = {"version": 1, "pages": {
+            "index.md": entry("/", "Home"),
+            "blog/index.md": entry("/blog", "Blog"),
+            "blog/a/index.md": entry("/blog/a", "A & B", "2024-01-01", ["elves"]),
+            "blog/b/index.md": entry("/blog/b", "Bee", "2024-03-01", ["elves", "Tom Bombadil"]),
+            "blog/c/index.md": entry("/blog/c", "Cee"),
+            "blog/d/index.md": entry("/blog/d", "Draft", "2024-04-01", ["elves"], draft=True),
+        }}
+
+    def test_section_pages_order(self):
+        self.assertEqual([e["url"] for e in section_pages(self.index, "blog")], ["/blog/b", "/blog/a", "/blog/c"])
+
+    def test_paginate(self):
+        self.assertEqual(paginate([1, 2, 3], 2), [[1, 2], [3]])
+        self.assertEqual(paginate([], 2), [[]])
+
+    def test_output_for_url(self):
+        self.assertEqual(output_for_url("/blog/page/2"), "blog/page/2/index.html")
+        self.assertEqual(output_for_url("/"), "index.html")
+
+    def test_slugify(self):
+        self.assertEqual(slugify("Tom Bombadil"), "tom-bombadil")
+
+    def test_colliding_tags_get_unique_slugs(self):
+        self.assertEqual(tag_slugs(["C++", "C#", "c-2", "elves"]), {"C#": "c", "C++": "c-2", "c-2": "c-2-2", "elves": "elves"})
+        self.index["pages"]["blog/e/index.md"] = entry("/blog/e", "Code", "2024-02-01", ["C++", "C#"])
+        urls = [url for url, _, _ in collection_pages(self.index, None)]
+        self.assertIn("/tags/c", urls)
+        self.assertIn("/tags/c-2", urls)
+        self.assertEqual(len(urls), len(set(urls)))
+
+    def test_collection_pages(self):
+        pages = collection_pages(self.index, "blog", per_page=2)
+        urls = [url for url, _, _ in pages]
+        self.assertEqual(urls, ["/blog", "/blog/page/2", "/tags", "/tags/tom-bombadil", "/tags/elves"])
+        first = pages[0][2].to_html()
+        self.assertIn('<a href="/blog/page/2" rel="next">Older</a>', first)
+        self.assertNotIn("Draft", first)
+        self.assertEqual(pages[1][1], "Blog, page 2")
+
+    def test_feed_escapes_and_skips_undated(self):
+        feed = atom_feed(self.index, "blog", "https://example.com", "/site/")
+        self.assertIn("<title>A &amp; B</title>", feed)
+        self.assertIn('<link href="https://example.com/site/blog/b"/>', feed)
+        self.assertIn("<updated>2024-03-01T00:00:00Z</updated>", feed)
+        self.assertNotIn("Cee", feed)
+
+    def test_sitemap_lists_each_url_once(self):
+        xml = sitemap(self.index, ["/blog", "/tags"], "https://example.com/")
+        self.assertEqual(xml.count("<loc>https://example.com/blog</loc>"), 1)
+        self.assertIn("<loc>https://example.com/blog/b</loc><lastmod>2024-03-01</lastmod>", xml)
+        self.assertNotIn("/blog/d", xml)
+
+    def test_signature_ignores_size_and_mtime(self):
+        before = collections_signature(self.index, "/")
+        self.index["pages"]["blog/a/index.md"]["mtime"] = 2
+        self.assertEqual(collections_signature(self.index, "/"), before)
+        self.index["pages"]["blog/a/index.md"]["meta"]["tags"] = []
+        self.assertNotEqual(collections_signature(self.index, "/"), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,18 @@
+import inspect
+import json
+import os
+import pickle
+import subprocess
+import sys
 import unittest
-from main import extract_title
+from unittest import mock
+import main
+from metadata import draft_sources, refresh_index
+from htmlnode import url_resolver
+from profiler import PAGE_STAGES, Profiler
+from textnode import scan_blocks
+from main import BuildOptions, extract_title, generate_pages_recursive, generate_targets, rebuild_changes, render_typed_blocks
+from tempdir import TempDirTestCase
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -32,6 +45,604 @@ class TestExtractTitle(unittest.TestCase):
     def test_extract_title_multiple_h1(self):
         markdown = "# First Title\n\nContent\n\n# Second Title"
         self.assertEqual(extract_title(markdown), "First Title")
+    
+    def test_extract_title_front_matter(self):
+        markdown = "---\ntitle: Front\n---\n# Heading"
+        self.assertEqual(extract_title(markdown), "Front")
+
+    def test_extract_title_after_single_line_fence(self):
+        markdown = "```x = 1```\n\n# Title"
+        self.assertEqual(extract_title(markdown), "Title")
+
+
+class TestRenderTypedBlocks(unittest.TestCase):
+    def test_title_and_tree(self):
+        trees, title = render_typed_blocks(scan_blocks(["Intro", "", "# Title", "", "Body"]))
+        self.assertEqual(title, "Title")
+        self.assertEqual(trees["/"].to_html(), "<div><p>Intro</p><h1>Title</h1><p>Body</p></div>")
+
+    def test_title_ignores_code_blocks(self):
+        node, title = render_typed_blocks(scan_blocks(["```", "# not a title", "```", "", "# Real"]))
+        self.assertEqual(title, "Real")
+
+    def test_no_title(self):
+        with self.assertRaises(Exception):
+            render_typed_blocks(scan_blocks(["## Only h2"]))
+
+    def test_front_matter_title(self):
+        _, title = render_typed_blocks(scan_blocks(["No heading here"]), title="From front matter")
+        self.assertEqual(title, "From front matter")
+
+    def test_one_tree_shared_across_basepaths(self):
+        trees, _ = render_typed_blocks(scan_blocks(["# T"]), basepaths=["/", "/site/"])
+        self.assertIs(trees["/"], trees["/site/"])
+
+    def test_basepath_resolved_on_links_not_code(self):
+        lines = ["# T", "", "[a](/a)", "", "```", '<a href="/a">', "```"]
+        trees, _ = render_typed_blocks(scan_blocks(lines))
+        html = "".join(trees["/"].iter_html(url_resolver("/site/")))
+        self.assertIn('<a href="/site/a">a</a>', html)
+        self.assertIn('<code><a href="/a">\n</code>', html)
+
+
+class TestBuildOptions(unittest.TestCase):
+    def test_workers_get_options_without_profiler(self):
+        options = BuildOptions(jobs=2, profiler=Profiler(), minify=True)
+        copy = pickle.loads(pickle.dumps(options))
+        self.assertIsNone(copy.profiler)
+        self.assertTrue(copy.profile)
+        self.assertTrue(copy.minify)
+
+    def test_replace_keeps_other_fields(self):
+        profiler = Profiler()
+        options = BuildOptions(jobs=3, profiler=profiler).replace(drafts={"a.md"})
+        self.assertEqual((options.jobs, options.profiler, options.drafts), (3, profiler, {"a.md"}))
+        self.assertFalse(options.replace(profiler=None).profile)
+
+
+class SiteTestCase(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.dest = os.path.join(self.root, "docs")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, "docs.manifest.json")
+        self.write(self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nBody")
+
+    def read_outputs(self, dest):
+        # Every file under dest by relative path, with its text.
+        outputs = {}
+        for dirpath, _, filenames in os.walk(dest):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, dest)] = f.read()
+        return outputs
+
+    def build(self, basepath="/"):
+        with mock.patch("main.render_page", wraps=main.render_page) as generate:
+            generate_pages_recursive(self.content, self.template, self.dest, basepath, self.manifest)
+        return sorted(call.args[0] for call in generate.call_args_list)
+
+
+class TestIncrementalBuild(SiteTestCase):
+    def test_first_build_generates_everything(self):
+        self.assertEqual(len(self.build()), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+
+    def test_rebuild_skips_unchanged_pages(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_rebuild_only_changed_page(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nUpdated welcome text")
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_template_change_rebuilds_everything(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        self.assertEqual(len(self.build("/site/")), 2)
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.dest, "index.html"))
+        self.assertEqual(self.build(), [os.path.join(self.content, "index.md")])
+
+    def test_block_cache_hits_after_template_change(self):
+        cache_path = os.path.join(self.root, "docs.blockcache.sqlite")
+        generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, cache_path=cache_path)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            uncached = f.read()
+        self.write(self.template, "<title>{{ Title }}</title><body>{{ Content }}</body>\n")
+        results = generate_pages_recursive(self.content, self.template, self.dest, "/", self.manifest, cache_path=cache_path)
+        self.assertEqual(sum(result["cache"]["misses"] for result in results), 0)
+        self.assertEqual(sum(result["cache"]["hits"] for result in results), 4)
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), uncached + "\n")
+
+    def test_front_matter_not_rendered(self):
+        self.write(os.path.join(self.content, "index.md"), "---\ntitle: Front\ntags: [a]\n---\nWelcome")
+        self.build()
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Front</title><body><div><p>Welcome</p></div></body>")
+
+    def test_failed_page_is_reported_and_retried(self):
+        broken = os.path.join(self.content, "broken.md")
+        self.write(broken, "No title here")
+        with self.assertRaises(Exception):
+            self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+        self.write(broken, "# Fixed\n\nNow it has a title")
+        self.assertEqual(self.build(), [broken])
+
+
+class TestDrafts(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.secret = os.path.join(self.content, "blog", "secret", "index.md")
+        self.secret_output = os.path.join(self.dest, "blog", "secret", "index.html")
+        self.write(self.secret, "---\ndraft: true\n---\n# Secret")
+        self.targets = [("/", self.dest, self.manifest)]
+
+    def drafts(self):
+        index, _ = refresh_index(self.content, os.path.join(self.root, "docs.metadata.json"))
+        return draft_sources(index, self.content)
+
+    def test_drafts_not_published(self):
+        generate_targets(self.content, self.template, self.targets, BuildOptions(drafts=self.drafts()))
+        self.assertFalse(os.path.exists(self.secret_output))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+        with open(self.manifest) as f:
+            self.assertNotIn(self.secret, json.load(f)["pages"])
+
+    def test_page_turned_draft_is_removed(self):
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        generate_targets(self.content, self.template, self.targets, BuildOptions(drafts=self.drafts()))
+        self.write(post, "---\ndraft: yes\n---\n# Post")
+        generate_targets(self.content, self.template, self.targets, BuildOptions(drafts=self.drafts()))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post", "index.html")))
+
+    def test_rebuild_removes_new_draft(self):
+        self.write(self.secret, "# Secret")
+        generate_targets(self.content, self.template, self.targets, BuildOptions(drafts=self.drafts()))
+        self.assertTrue(os.path.exists(self.secret_output))
+        self.write(self.secret, "---\ndraft: true\n---\n# Secret")
+        main.rebuild_pages({self.secret}, set(), self.content, self.template, self.targets, BuildOptions(drafts=self.drafts()))
+        self.assertFalse(os.path.exists(self.secret_output))
+        with open(self.manifest) as f:
+            self.assertNotIn(self.secret, json.load(f)["pages"])
+
+
+class TestCollections(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "---\ndate: 2024-01-01\ntags: [a]\n---\n# Post\n\nBody")
+        self.index_path = os.path.join(self.root, "docs.metadata.json")
+        self.targets = [("/", self.dest, self.manifest)]
+
+    def generate(self):
+        self.build()
+        index, _ = refresh_index(self.content, self.index_path)
+        with mock.patch("main.write_atomic", wraps=main.write_atomic) as write:
+            main.generate_collections(index, self.content, self.template, self.targets, "blog", "https://example.com")
+        return sorted(os.path.relpath(call.args[0], self.dest) for call in write.call_args_list)
+
+    def test_generates_listing_tags_feed_and_sitemap(self):
+        written = self.generate()
+        self.assertEqual(written, [
+            os.path.join("blog", "index.html"), "feed.xml", "sitemap.xml",
+            os.path.join("tags", "a", "index.html"), os.path.join("tags", "index.html"),
+        ])
+        with open(os.path.join(self.dest, "blog", "index.html")) as f:
+            self.assertIn('<a href="/blog/post">Post</a>', f.read())
+
+    def test_body_edit_does_not_regenerate(self):
+        self.generate()
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "---\ndate: 2024-01-01\ntags: [a]\n---\n# Post\n\nLonger body")
+        self.assertEqual(self.generate(), [])
+
+    def test_metadata_change_regenerates_and_removes_stale(self):
+        self.generate()
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "---\ndate: 2024-01-01\ntags: [b]\n---\n# Post\n\nBody")
+        self.assertIn(os.path.join("tags", "b", "index.html"), self.generate())
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "tags", "a")))
+
+    def test_content_page_wins_over_listing(self):
+        self.write(os.path.join(self.content, "blog", "index.md"), "# My blog")
+        self.assertNotIn(os.path.join("blog", "index.html"), self.generate())
+        with open(os.path.join(self.dest, "blog", "index.html")) as f:
+            self.assertIn("My blog", f.read())
+
+
+class TestMinifiedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>\n<body>\n  {{ Content }}\n</body>\n")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n> one\n> two\n\n```\nkeep   this\n  indented\n```")
+        self.cache_path = os.path.join(self.root, "docs.blockcache.sqlite")
+
+    def build_minified(self, minify=True, cache_path=None):
+        with mock.patch("main.render_page", wraps=main.render_page) as render:
+            generate_targets(self.content, self.template, [("/", self.dest, self.manifest)], BuildOptions(cache_path=cache_path, minify=minify))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            return f.read(), len(render.call_args_list)
+
+    def test_minified_page(self):
+        html, _ = self.build_minified()
+        self.assertEqual(
+            html,
+            "<title>Home</title><body><div><h1>Home</h1><blockquote>one two</blockquote>"
+            "<pre><code>keep   this\n  indented\n</code></pre></div></body>",
+        )
+
+    def test_cached_blocks_match_uncached(self):
+        uncached, _ = self.build_minified()
+        os.remove(self.manifest)
+        self.build_minified(cache_path=self.cache_path)
+        os.remove(self.manifest)
+        self.assertEqual(self.build_minified(cache_path=self.cache_path)[0], uncached)
+
+    def test_toggling_minify_rebuilds_everything(self):
+        self.build_minified()
+        self.assertEqual(self.build_minified()[1], 0)
+        html, rendered = self.build_minified(minify=False)
+        self.assertEqual(rendered, 2)
+        self.assertIn("<body>\n  <div>", html)
+
+
+class TestPageExtras(SiteTestCase):
+    def test_rendered_pages_return_terms(self):
+        targets = [("/", self.dest, self.manifest)]
+        results = generate_targets(self.content, self.template, targets, BuildOptions(search={"skip_code": False}))
+        terms = {os.path.relpath(result["source"], self.content): result["search"] for result in results}
+        self.assertEqual(terms["index.md"], {"home": 1, "welcome": 1})
+        self.assertEqual(generate_targets(self.content, self.template, targets, BuildOptions(search={"skip_code": False})), [])
+
+    def test_pipeline_returns_same_terms(self):
+        cache_path = os.path.join(self.root, "docs.blockcache.sqlite")
+        job = (os.path.join(self.content, "blog", "post", "index.md"), [("/", os.path.join(self.dest, "post.html"))])
+        result = main.build_page(job, self.template, BuildOptions(search={"skip_code": False}))
+        text = main.render_page_text(main.read_page(job), self.template, BuildOptions(cache_path=cache_path, search={"skip_code": False}))[0]
+        self.assertEqual(result["search"], text["search"])
+
+    def test_links_unaffected_by_cache_and_basepath(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n[Post](/blog/post) ![css](/index.css)")
+        cache_path = os.path.join(self.root, "docs.blockcache.sqlite")
+        job = (os.path.join(self.content, "index.md"), [("/site/", os.path.join(self.dest, "index.html"))])
+        uncached = main.build_page(job, self.template, BuildOptions(links=True))
+        main.build_page(job, self.template, BuildOptions(cache_path=cache_path, links=True))
+        cached = main.build_page(job, self.template, BuildOptions(cache_path=cache_path, links=True))
+        self.assertEqual(cached["cache"]["misses"], 0)
+        self.assertEqual(uncached["links"], ["/blog/post", "/index.css"])
+        self.assertEqual(cached["links"], uncached["links"])
+
+
+class TestFingerprintedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(self.template, '<link href="/index.css"><title>{{ Title }}</title><body>{{ Content }}</body>')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![css](/index.css)")
+        self.targets = [("/site/", self.dest, self.manifest)]
+
+    def build_fingerprinted(self):
+        with mock.patch("builtins.print"):
+            main.sync_static(self.static, self.dest, self.manifest)
+            assets = main.fingerprint_targets(self.targets)
+            with mock.patch("main.render_page", wraps=main.render_page) as render:
+                generate_targets(self.content, self.template, self.targets, BuildOptions(assets=assets))
+        return assets, len(render.call_args_list)
+
+    def test_pages_and_template_point_at_hashed_names(self):
+        assets, _ = self.build_fingerprinted()
+        hashed = dict(assets)["/index.css"]
+        with open(os.path.join(self.dest, "index.html")) as f:
+            html = f.read()
+        self.assertIn(f'<link href="/site{hashed}">', html)
+        self.assertIn(f'<img src="/site{hashed}" alt="css"', html)
+
+    def test_asset_change_rebuilds_pages_once(self):
+        self.build_fingerprinted()
+        self.assertEqual(self.build_fingerprinted()[1], 0)
+        self.write(os.path.join(self.static, "index.css"), "main {}")
+        self.assertEqual(self.build_fingerprinted()[1], 2)
+
+
+class TestRebuildChanges(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.root, "static")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.build()
+
+    def rebuild(self, changed=(), removed=()):
+        with mock.patch("main.render_page", wraps=main.render_page) as generate:
+            rebuild_changes(
+                set(changed), set(removed), self.content, self.static, self.template, [("/", self.dest, self.manifest)]
+            )
+        return sorted(call.args[0] for call in generate.call_args_list)
+
+    def test_markdown_edit_renders_one_page(self):
+        source = os.path.join(self.content, "index.md")
+        self.write(source, "# Home\n\nEdited")
+        self.assertEqual(self.rebuild(changed=[source]), [source])
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn("Edited", f.read())
+        self.assertEqual(self.build(), [])
+
+    def test_markdown_delete_removes_page(self):
+        source = os.path.join(self.content, "blog", "post", "index.md")
+        os.remove(source)
+        self.assertEqual(self.rebuild(removed=[source]), [])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_template_edit_renders_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.rebuild(changed=[self.template])), 2)
+
+    def test_static_edit_copies_one_file(self):
+        css = os.path.join(self.static, "index.css")
+        self.assertEqual(self.rebuild(changed=[css]), [])
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_non_markdown_content_ignored(self):
+        swap = os.path.join(self.content, ".index.md.swp")
+        self.write(swap, "junk")
+        self.assertEqual(self.rebuild(changed=[swap]), [])
+
+
+class TestMultipleTargets(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nSee [the post](/blog/post/)")
+        self.site = os.path.join(self.root, "site")
+        self.targets = [
+            ("/", self.dest, self.manifest),
+            ("/site/", self.site, os.path.join(self.root, "site.manifest.json")),
+        ]
+
+    def build_targets(self):
+        with mock.patch("main.render_page", wraps=main.render_page) as render:
+            generate_targets(self.content, self.template, self.targets)
+        return sorted(call.args[0] for call in render.call_args_list)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def test_each_page_parsed_once_for_all_targets(self):
+        self.assertEqual(len(self.build_targets()), 2)
+        self.assertIn('href="/blog/post/"', self.read(os.path.join(self.dest, "index.html")))
+        self.assertIn('href="/site/blog/post/"', self.read(os.path.join(self.site, "index.html")))
+
+    def test_matches_separate_builds(self):
+        self.build_targets()
+        separate = os.path.join(self.root, "separate")
+        generate_pages_recursive(self.content, self.template, separate, "/site/")
+        for rel_path in ("index.html", os.path.join("blog", "post", "index.html")):
+            self.assertEqual(self.read(os.path.join(self.site, rel_path)), self.read(os.path.join(separate, rel_path)))
+
+    def test_only_stale_targets_are_written(self):
+        self.build_targets()
+        os.remove(os.path.join(self.site, "index.html"))
+        with mock.patch("main.render_page", wraps=main.render_page) as render:
+            generate_targets(self.content, self.template, self.targets)
+        source = os.path.join(self.content, "index.md")
+        render.assert_called_once()
+        self.assertEqual(render.call_args.args[2], [("/site/", os.path.join(self.site, "index.html"))])
+        self.assertEqual(render.call_args.args[0], source)
+        self.assertEqual(self.build_targets(), [])
+
+    def test_static_shared_by_hardlink(self):
+        static = os.path.join(self.root, "static")
+        self.write(os.path.join(static, "index.css"), "body {}")
+        args = main.parse_args(["--target", "/", self.dest, "--target", "/site/", self.site])
+        with mock.patch("main.STATIC_DIR", static):
+            main.sync_targets(args, main.site_targets(args))
+        self.assertTrue(os.path.samefile(os.path.join(self.dest, "index.css"), os.path.join(self.site, "index.css")))
+
+    def test_duplicate_target_dirs_rejected(self):
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            main.parse_args(["--target", "/", "out", "--target", "/site/", "out/"])
+
+
+class TestBoundedMemory(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>\n<body>{{ Content }}</body>\n<footer>{{ Title }}</footer>")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "---\ntitle: Home\n---\nIntro [post](/blog/post)\n\n```\ncode  [x](/y)\n```\n\n- a\n- b",
+        )
+        self.cache_path = os.path.join(self.root, "docs.blockcache.sqlite")
+
+    def build_into(self, name, **options):
+        targets = [("/", os.path.join(self.root, name, "a"), None), ("/site/", os.path.join(self.root, name, "b"), None)]
+        results = generate_targets(self.content, self.template, targets, BuildOptions(search={"skip_code": False}, links=True, **options))
+        extras = {result["source"]: (result["search"], result["links"]) for result in results}
+        return self.read_outputs(os.path.join(self.root, name)), extras
+
+    def test_streamed_output_matches_tree_output(self):
+        self.write(os.path.join(self.content, "fenced.md"), "```x = 1```\n\n# Fenced\n\nText")
+        for options in ({}, {"minify": True}, {"cache_path": self.cache_path}):
+            self.assertEqual(self.build_into("streamed", max_memory=1024, **options), self.build_into("tree", **options))
+
+    def test_collect_pages_deeper_than_recursion_limit(self):
+        # Cleanup recurses per level, so the limit is lowered rather than the tree made deeper than it.
+        path = os.path.join(self.content, *["d"] * 200)
+        self.write(os.path.join(path, "deep.md"), "# Deep")
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(len(inspect.stack()) + 50)
+        try:
+            pages = main.collect_pages(self.content, self.dest)
+        finally:
+            sys.setrecursionlimit(limit)
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(pages[0][0], os.path.join(self.content, "blog", "post", "index.md"))
+        self.assertEqual(pages[1][1], os.path.join(self.dest, path[len(self.content) + 1:], "deep.html"))
+
+    def test_over_budget_fails_the_page(self):
+        job = (os.path.join(self.content, "index.md"), [("/", os.path.join(self.dest, "index.html"))])
+        result = main.build_page(job, self.template, BuildOptions(max_memory=1))
+        self.assertTrue(result["error"].startswith("MemoryError: Rendering"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_max_memory_excludes_pipeline_and_profile(self):
+        for flag in ("--pipeline", "--profile"):
+            with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+                main.parse_args(["--max-memory", "64", flag])
+
+    def test_synthetic_site_under_rss_limit(self):
+        # BOUNDED_BUILD_SITE_MB=4096 builds a multi-GB site under the same limit.
+        site_mb = os.environ.get("BOUNDED_BUILD_SITE_MB", "4")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_memory.py")
+        output = subprocess.run(
+            [sys.executable, script, "--site-mb", site_mb, "--page-mb", "2", "--max-memory", "48"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        self.assertEqual(result["failed"], 0)
+        self.assertLess(result["peak_rss_kb"], 48 * 1024)
+
+
+class TestShardedBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(6):
+            self.write(os.path.join(self.content, "blog", f"post{i}", "index.md"), f"# Post {i}\n\n" + "Body " * (i * 50))
+        self.targets = [("/", self.dest, self.manifest)]
+
+    def build_shards(self, count):
+        # Each shard is its own interpreter, as it would be on its own machine.
+        code = "import main; main.generate_targets({!r}, {!r}, main.shard_targets({!r}, {}, {}), main.BuildOptions(shard=({}, {})))"
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-c", code.format(self.content, self.template, self.targets, index, count, index, count)],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdout=subprocess.DEVNULL,
+            )
+            for index in range(1, count + 1)
+        ]
+        self.assertEqual([process.wait() for process in processes], [0] * count)
+
+    def test_merged_shards_match_single_build(self):
+        single = os.path.join(self.root, "single")
+        generate_pages_recursive(self.content, self.template, single, "/", os.path.join(self.root, "single.manifest.json"))
+        self.build_shards(3)
+        main.merge_shards(self.content, self.targets, 3)
+        self.assertEqual(self.read_outputs(self.dest), self.read_outputs(single))
+        with open(self.manifest) as f:
+            manifest = json.load(f)
+        self.assertNotIn("shard", manifest)
+        self.assertEqual(len(manifest["pages"]), 8)
+        self.assertEqual(self.build(), [])
+
+    def test_shards_split_the_pages(self):
+        self.build_shards(3)
+        built = [self.read_outputs(main.shard_targets(self.targets, index, 3)[0][1]) for index in (1, 2, 3)]
+        self.assertTrue(all(built))
+        self.assertEqual(sum(len(outputs) for outputs in built), 8)
+
+    def test_merge_refuses_incomplete_shards(self):
+        self.build_shards(2)
+        self.write(os.path.join(self.content, "new.md"), "# New")
+        with self.assertRaises(Exception):
+            main.merge_shards(self.content, self.targets, 2)
+        self.assertFalse(os.path.exists(self.dest))
+        with self.assertRaises(Exception):
+            main.merge_shards(self.content, self.targets, 3)
+
+    def test_shard_flag_conflicts(self):
+        self.assertEqual(main.parse_args(["--shard", "2/3"]).shard, (2, 3))
+        for argv in (["--shard", "4/3"], ["--shard", "1/2", "--watch"], ["--shard", "1/2", "--merge-shards", "2"]):
+            with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+                main.parse_args(argv)
+
+
+class TestParallelBuild(SiteTestCase):
+    # Its own pages only, so setUp skips SiteTestCase's.
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.content = os.path.join(self.root, "content")
+        self.template = self.write("template.html", '<title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body>')
+        for i in range(8):
+            self.write(os.path.join(self.content, f"post{i}", "index.md"), f"# Post {i}\n\nSee [home](/) and **bold {i}**")
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        generate_pages_recursive(self.content, self.template, parallel, "/site/", jobs=3)
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(parallel))
+        self.assertEqual(len(self.read_outputs(parallel)), 8)
+
+    def test_parallel_errors_reported_per_page(self):
+        self.write(os.path.join(self.content, "post3", "index.md"), "No heading")
+        dest = os.path.join(self.root, "docs")
+        with mock.patch("builtins.print") as printed:
+            with self.assertRaises(Exception):
+                generate_pages_recursive(self.content, self.template, dest, jobs=2)
+        messages = [call.args[0] for call in printed.call_args_list]
+        self.assertTrue(any("post3" in m and m.startswith("Error generating page") for m in messages))
+        self.assertEqual(len(self.read_outputs(dest)), 7)
+
+    def test_profiled_parallel_build(self):
+        profiler = Profiler()
+        serial = os.path.join(self.root, "serial")
+        profiled = os.path.join(self.root, "profiled")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        generate_pages_recursive(self.content, self.template, profiled, "/site/", jobs=2, profiler=profiler)
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(profiled))
+        totals = profiler.page_totals()
+        self.assertEqual(len(totals), 8)
+        for stages in totals.values():
+            self.assertEqual(sorted(stages), sorted(PAGE_STAGES))
+
+    def test_pipeline_output_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        piped = os.path.join(self.root, "piped")
+        generate_pages_recursive(self.content, self.template, serial, "/site/")
+        targets = [("/site/", piped, None)]
+        generate_targets(self.content, self.template, targets, BuildOptions(jobs=2, pipeline=True))
+        self.assertEqual(self.read_outputs(serial), self.read_outputs(piped))
+
+    def test_pipeline_errors_reported_per_page(self):
+        self.write(os.path.join(self.content, "post3", "index.md"), "No heading")
+        dest = os.path.join(self.root, "docs")
+        with mock.patch("builtins.print") as printed:
+            with self.assertRaises(Exception):
+                generate_targets(self.content, self.template, [("/", dest, None)], BuildOptions(jobs=2, pipeline=True))
+        messages = [call.args[0] for call in printed.call_args_list]
+        self.assertTrue(any("post3" in m and m.startswith("Error generating page") for m in messages))
+        self.assertEqual(len(self.read_outputs(dest)), 7)
+
+    def test_parse_args_pipeline_without_profile(self):
+        self.assertTrue(main.parse_args(["--pipeline"]).pipeline)
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            main.parse_args(["--pipeline", "--profile"])
+
+    def test_parse_args_jobs(self):
+        args = main.parse_args(["/site/", "--jobs", "4"])
+        self.assertEqual(args.basepath, "/site/")
+        self.assertEqual(args.jobs, 4)
 
 
 if __name__ == "__main__":
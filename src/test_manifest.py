@@ -0,0 +1,90 @@
+import os
+import unittest
+from manifest import (
+    file_hash,
+    is_current,
+    load_json_state,
+    load_manifest,
+    manifest_path_for,
+    new_manifest,
+    remove_stale_outputs,
+    save_json_state,
+    save_manifest,
+    source_entry,
+    write_atomic,
+)
+from tempdir import TempDirTestCase
+
+
+class TestManifest(TempDirTestCase):
+    def test_manifest_path_beside_output(self):
+        self.assertEqual(manifest_path_for("docs/"), "docs.manifest.json")
+
+    def test_load_missing_manifest(self):
+        path = os.path.join(self.root, "missing.json")
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_load_corrupt_manifest(self):
+        path = self.write("bad.json", "{not json")
+        self.assertEqual(load_manifest(path), new_manifest())
+
+    def test_json_state_of_other_version_discarded(self):
+        path = os.path.join(self.root, "state.json")
+        save_json_state(path, {"version": 1, "pages": {"a": 1}})
+        self.assertEqual(load_json_state(path, 1, dict), {"version": 1, "pages": {"a": 1}})
+        self.assertEqual(load_json_state(path, 2, lambda: {"version": 2}), {"version": 2})
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_failed_write_keeps_old_file(self):
+        path = self.write("page.html", "old")
+        def fail(f):
+            f.write("half")
+            raise RuntimeError("render failed")
+        with self.assertRaises(RuntimeError):
+            write_atomic(path, fail)
+        with open(path) as f:
+            self.assertEqual(f.read(), "old")
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_save_and_load_roundtrip(self):
+        path = os.path.join(self.root, "docs.manifest.json")
+        manifest = new_manifest()
+        manifest["basepath"] = "/site/"
+        save_manifest(path, manifest)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_file_hash_changes_with_content(self):
+        path = self.write("a.md", "# One")
+        first = file_hash(path)
+        self.write("a.md", "# Two")
+        self.assertNotEqual(first, file_hash(path))
+
+    def test_entry_current_when_unchanged(self):
+        source = self.write("a.md", "# One")
+        dest = self.write("a.html", "<p>One</p>")
+        previous = source_entry(source, dest)
+        self.assertTrue(is_current(previous, source_entry(source, dest, previous)))
+
+    def test_entry_stale_when_content_changes(self):
+        source = self.write("a.md", "# One")
+        dest = self.write("a.html", "<p>One</p>")
+        previous = source_entry(source, dest)
+        self.write("a.md", "# Changed")
+        self.assertFalse(is_current(previous, source_entry(source, dest, previous)))
+
+    def test_entry_stale_when_output_missing(self):
+        source = self.write("a.md", "# One")
+        dest = os.path.join(self.root, "a.html")
+        previous = source_entry(source, dest)
+        self.assertFalse(is_current(previous, source_entry(source, dest, previous)))
+
+    def test_remove_stale_outputs(self):
+        dest = self.write("gone.html", "<p>Gone</p>")
+        old_pages = {"gone.md": {"hash": "x", "output": dest}}
+        removed = remove_stale_outputs(old_pages, {})
+        self.assertEqual(removed, [dest])
+        self.assertFalse(os.path.exists(dest))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import unittest
+from unittest import mock
+from metadata import (
+    all_tags,
+    first_heading,
+    index_path_for,
+    load_index,
+    new_index,
+    page_url,
+    pages_by_date,
+    pages_with_tag,
+    parse_front_matter,
+    refresh_index,
+    update_index,
+)
+from tempdir import TempDirTestCase
+
+
+class TestParseFrontMatter(unittest.TestCase):
+    def parse(self, text):
+        meta, body = parse_front_matter(text.splitlines(keepends=True))
+        return meta, "".join(body)
+
+    def test_no_front_matter(self):
+        meta, body = self.parse("# Title\n\nBody\n")
+        self.assertEqual(meta, {"title": None, "date": None, "tags": [], "draft": False})
+        self.assertEqual(body, "# Title\n\nBody\n")
+
+    def test_fields(self):
+        meta, body = self.parse(
+            "---\ntitle: \"Tom: a mistake\"\ndate: 2024-03-01\ntags: [tolkien, characters]\ndraft: true\n---\n# Tom\n"
+        )
+        self.assertEqual(meta["title"], "Tom: a mistake")
+        self.assertEqual(meta["date"], "2024-03-01")
+        self.assertEqual(meta["tags"], ["tolkien", "characters"])
+        self.assertTrue(meta["draft"])
+        self.assertEqual(body, "# Tom\n")
+
+    def test_block_list_and_extra_keys(self):
+        meta, _ = self.parse("---\ntags:\n  - elves\n  - 'rings'\nauthor: JRR\n---\n")
+        self.assertEqual(meta["tags"], ["elves", "rings"])
+        self.assertEqual(meta["author"], "JRR")
+
+    def test_body_is_not_consumed(self):
+        lines = iter(["---\n", "title: T\n", "---\n", "first\n", "second\n"])
+        parse_front_matter(lines)
+        self.assertEqual(next(lines), "first\n")
+
+    def test_errors(self):
+        for text in ("---\ntitle: T\n", "---\nnot a field\n---\n", "---\ndate: soon\n---\n", "---\ndraft: maybe\n---\n"):
+            with self.assertRaises(ValueError):
+                self.parse(text)
+
+
+class TestFirstHeading(unittest.TestCase):
+    def test_same_rule_as_rendering(self):
+        self.assertEqual(first_heading(["```x = 1```", "", "# Title"]), "Title")
+        self.assertEqual(first_heading(["text", "```", "more", "", "# Title"]), "Title")
+        self.assertIsNone(first_heading(["```", "# code", "```"]))
+
+
+class TestPageURL(unittest.TestCase):
+    def test_urls(self):
+        self.assertEqual(page_url("index.md"), "/")
+        self.assertEqual(page_url(os.path.join("blog", "tom", "index.md")), "/blog/tom")
+        self.assertEqual(page_url("about.md"), "/about.html")
+
+
+class TestMetadataIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.write_dir = self.content
+        self.path = os.path.join(self.root, "docs.metadata.json")
+        self.write("index.md", "# Home\n")
+        self.write("blog/tom/index.md", "---\ndate: 2024-01-05\ntags: [tolkien]\n---\n# Tom\n")
+        self.write("blog/elves/index.md", "---\ntitle: Elves\ndate: 2024-02-01\ntags: [tolkien, elves]\n---\nBody\n")
+        self.write("blog/wip/index.md", "---\ndate: 2024-03-01\ntags: [elves]\ndraft: yes\n---\n# WIP\n")
+
+    def test_index_path_beside_output(self):
+        self.assertEqual(index_path_for("docs/"), "docs.metadata.json")
+
+    def test_load_corrupt_index(self):
+        with open(self.path, 'w') as f:
+            f.write("{not json")
+        self.assertEqual(load_index(self.path), new_index())
+
+    def test_titles_from_front_matter_or_heading(self):
+        index, updated = refresh_index(self.content, self.path)
+        self.assertEqual(updated, 4)
+        titles = {rel_path: entry["meta"]["title"] for rel_path, entry in index["pages"].items()}
+        self.assertEqual(titles[os.path.join("blog", "tom", "index.md")], "Tom")
+        self.assertEqual(titles[os.path.join("blog", "elves", "index.md")], "Elves")
+
+    def test_only_changed_sources_reread(self):
+        refresh_index(self.content, self.path)
+        self.write("blog/tom/index.md", "---\ndate: 2024-01-05\ntags: [tolkien, hobbits]\n---\n# Tom\n")
+        os.remove(os.path.join(self.content, "index.md"))
+        with mock.patch("metadata.read_page_metadata", wraps=__import__("metadata").read_page_metadata) as read:
+            index, updated = refresh_index(self.content, self.path)
+        self.assertEqual([call.args[0] for call in read.call_args_list], [os.path.join(self.content, "blog", "tom", "index.md")])
+        self.assertEqual(updated, 2)
+        self.assertNotIn("index.md", index["pages"])
+
+    def test_queries_skip_drafts_and_do_not_read_sources(self):
+        index, _ = refresh_index(self.content, self.path)
+        index = load_index(self.path)
+        with mock.patch("builtins.open", side_effect=AssertionError("query read a file")):
+            by_date = [entry["url"] for _, entry in pages_by_date(index, "blog")]
+            tagged = [entry["url"] for _, entry in pages_with_tag(index, "elves")]
+            tags = all_tags(index)
+        self.assertEqual(by_date, ["/blog/elves", "/blog/tom"])
+        self.assertEqual(tagged, ["/blog/elves"])
+        self.assertEqual(tags, {"elves": 1, "tolkien": 2})
+
+    def test_unchanged_tree_is_not_rewritten(self):
+        index = new_index()
+        update_index(index, self.content)
+        self.assertEqual(update_index(index, self.content), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
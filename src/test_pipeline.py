@@ -0,0 +1,65 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pipeline import run_pipeline
+
+
+class TestRunPipeline(unittest.TestCase):
+    def run_items(self, items, read=str, render=str.upper, write=lambda value: value + "!", **kwargs):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return run_pipeline(items, read, render, write, executor, renderers=2, **kwargs)
+
+    def test_results_in_input_order(self):
+        def read(item):
+            time.sleep(0.001 * (item % 3))
+            return f"item{item}"
+
+        results = self.run_items(range(20), read=read)
+        self.assertEqual(results, [(f"ITEM{i}!", None) for i in range(20)])
+
+    def test_empty(self):
+        self.assertEqual(self.run_items([]), [])
+
+    def test_error_skips_later_stages(self):
+        written = []
+
+        def render(value):
+            if value == "2":
+                raise ValueError("bad page")
+            return value
+
+        def write(value):
+            written.append(value)
+            return value
+
+        results = self.run_items(range(4), render=render, write=write)
+        value, error = results[2]
+        self.assertEqual(value, "2")
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(sorted(written), ["0", "1", "3"])
+        self.assertEqual([error for _, error in results].count(None), 3)
+
+    def test_queues_bound_items_in_flight(self):
+        lock = threading.Lock()
+        state = {"in_flight": 0, "peak": 0}
+
+        def read(item):
+            with lock:
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+            return item
+
+        def write(item):
+            time.sleep(0.002)
+            with lock:
+                state["in_flight"] -= 1
+            return item
+
+        self.run_items(range(100), read=read, render=lambda item: item, write=write, readers=2, writers=1, queue_size=2)
+        # Two queues of two, plus the items each stage's workers hold.
+        self.assertLessEqual(state["peak"], 2 + 2 + 2 + 2 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+from profiler import NULL_PROFILER, PAGE_STAGES, Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def make_profiler(self):
+        profiler = Profiler()
+        profiler.merge([
+            {"page": "a.md", "stage": "read", "start": 1000, "duration": 2000000, "pid": 1},
+            {"page": "a.md", "stage": "write", "start": 4000000, "duration": 1000000, "pid": 1},
+            {"page": "b.md", "stage": "read", "start": 2000, "duration": 9000000, "pid": 2},
+        ])
+        return profiler
+
+    def test_stage_records_event(self):
+        profiler = Profiler()
+        with profiler.stage("a.md", "read"):
+            pass
+        self.assertEqual(len(profiler.events), 1)
+        event = profiler.events[0]
+        self.assertEqual((event["page"], event["stage"], event["pid"]), ("a.md", "read", os.getpid()))
+        self.assertGreaterEqual(event["duration"], 0)
+
+    def test_stage_records_event_on_error(self):
+        profiler = Profiler()
+        with self.assertRaises(ValueError):
+            with profiler.stage("a.md", "inline parse"):
+                raise ValueError("bad")
+        self.assertEqual(profiler.events[0]["stage"], "inline parse")
+
+    def test_page_totals(self):
+        self.assertEqual(
+            self.make_profiler().page_totals(),
+            {"a.md": {"read": 2000000, "write": 1000000}, "b.md": {"read": 9000000}},
+        )
+
+    def test_summary_orders_slowest_first(self):
+        lines = self.make_profiler().summary().splitlines()
+        self.assertIn("2 page(s)", lines[0])
+        for stage in PAGE_STAGES:
+            self.assertIn(stage, lines[1])
+        self.assertTrue(lines[3].startswith("b.md"))
+        self.assertTrue(lines[4].startswith("a.md"))
+
+    def test_write_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            self.make_profiler().write_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        events = trace["traceEvents"]
+        self.assertEqual(len(events), 3)
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["ts"], 0)
+        self.assertEqual(events[0]["dur"], 2000)
+        self.assertEqual(events[2]["args"], {"page": "b.md"})
+
+    def test_null_profiler(self):
+        self.assertFalse(NULL_PROFILER.enabled)
+        with NULL_PROFILER.stage("a.md", "read"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
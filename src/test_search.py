@@ -0,0 +1,113 @@
+import json
+import os
+import unittest
+from unittest import mock
+from htmlnode import LeafNode, ParentNode
+from metadata import new_index, update_index
+from search import (
+    PAGES_FILE,
+    SEARCH_DIR,
+    load_state,
+    new_state,
+    page_terms,
+    save_state,
+    shard_for,
+    state_path_for,
+    update_state,
+    write_search_files,
+)
+from tempdir import TempDirTestCase
+
+
+class TestPageTerms(unittest.TestCase):
+    def setUp(self):
+        self.tree = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "Tom Bombadil, "), LeafNode("b", "tom"), LeafNode("code", "print_x")]),
+            ParentNode("pre", [LeafNode("code", "def hobbit(): pass")]),
+        ])
+
+    def test_counts_leaf_text(self):
+        terms = page_terms(self.tree)
+        self.assertEqual(terms["tom"], 2)
+        self.assertEqual(terms["hobbit"], 1)
+        self.assertEqual(terms["print_x"], 1)
+
+    def test_skip_code(self):
+        self.assertEqual(page_terms(self.tree, skip_code=True), {"tom": 2, "bombadil": 1})
+
+    def test_cached_fragments_are_stripped(self):
+        tree = ParentNode("div", ['<p><a href="/x">Tom &amp; Goldberry</a></p>', "<pre><code>secret</code></pre>"])
+        self.assertEqual(page_terms(tree, skip_code=True), {"tom": 1, "goldberry": 1})
+
+    def test_unescaped_angle_bracket_in_fragment(self):
+        # Text is not escaped when serialized, so a bare "<" is not a tag.
+        tree = ParentNode("div", ['<p><a href="/">< Back Home</a></p>'])
+        self.assertEqual(page_terms(tree), {"back": 1, "home": 1})
+
+    def test_shard_for(self):
+        self.assertEqual(shard_for("tolkien"), "to")
+        self.assertEqual(shard_for("élan"), "_")
+
+
+class TestSearchIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.write_dir = self.content
+        self.dest = os.path.join(self.root, "docs")
+        self.write("index.md", "# Home\n\nWelcome to the shire")
+        self.write("blog/tom/index.md", "# Tom\n\nTom sings")
+        self.write("blog/wip/index.md", "---\ndraft: true\n---\n# Secret\n")
+        self.index = new_index()
+        update_index(self.index, self.content)
+
+    def read(self, name):
+        with open(os.path.join(self.dest, SEARCH_DIR, name)) as f:
+            return json.load(f)
+
+    def test_state_path_beside_output(self):
+        self.assertEqual(state_path_for("docs/"), "docs.search.json")
+
+    def test_shards_and_pages(self):
+        state = new_state()
+        shards, _ = update_state(state, self.index, self.content)
+        write_search_files(self.dest, state, shards)
+        pages = self.read(PAGES_FILE)["pages"]
+        self.assertEqual(sorted(url for url, _ in pages.values()), ["/", "/blog/tom"])
+        tom_id = next(page_id for page_id, (url, _) in pages.items() if url == "/blog/tom")
+        self.assertEqual(self.read("to.json")["tom"], [[int(tom_id), 2]])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, SEARCH_DIR, "se.json")))
+
+    def test_rendered_terms_used_and_unchanged_pages_not_reread(self):
+        state = new_state()
+        update_state(state, self.index, self.content)
+        self.write("blog/tom/index.md", "# Tom\n\nTom dances")
+        update_index(self.index, self.content)
+        rendered = {os.path.join("blog", "tom", "index.md"): {"tom": 2, "dances": 1}}
+        with mock.patch("search.source_terms", side_effect=AssertionError("source re-read")):
+            shards, listing_changed = update_state(state, self.index, self.content, rendered)
+        self.assertEqual(shards, {"da", "si"})
+        self.assertFalse(listing_changed)
+
+    def test_removed_page_empties_its_shards(self):
+        state = new_state()
+        write_search_files(self.dest, state, update_state(state, self.index, self.content)[0])
+        os.remove(os.path.join(self.content, "blog", "tom", "index.md"))
+        update_index(self.index, self.content)
+        shards, listing_changed = update_state(state, self.index, self.content)
+        write_search_files(self.dest, state, shards, listing_changed)
+        self.assertNotIn("tom", self.read("to.json"))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, SEARCH_DIR, "si.json")))
+        self.assertEqual(len(self.read(PAGES_FILE)["pages"]), 1)
+
+    def test_changed_settings_discard_state(self):
+        path = state_path_for(self.dest)
+        state = new_state()
+        update_state(state, self.index, self.content)
+        save_state(path, state)
+        self.assertEqual(load_state(path)["pages"].keys(), state["pages"].keys())
+        self.assertEqual(load_state(path, skip_code=True), new_state(skip_code=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import unittest
+from shard import check_shards, link_outputs, parse_shard, partition, shard_dir_for, shard_record
+from tempdir import TempDirTestCase
+
+
+class TestPartition(unittest.TestCase):
+    def setUp(self):
+        self.sizes = {f"content/page{i}.md": (i * 37) % 100 for i in range(40)}
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "3", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_dir_beside_output(self):
+        self.assertEqual(shard_dir_for("docs/", 2, 3), "docs.shard-2-of-3")
+
+    def test_every_page_in_exactly_one_shard(self):
+        shards = partition(self.sizes, 3)
+        self.assertEqual(sorted(source for sources in shards for source in sources), sorted(self.sizes))
+
+    def test_deterministic_and_independent_of_order(self):
+        reordered = dict(reversed(list(self.sizes.items())))
+        self.assertEqual(partition(self.sizes, 3), partition(reordered, 3))
+
+    def test_balanced_by_size(self):
+        loads = [sum(self.sizes[source] for source in sources) for sources in partition(self.sizes, 3)]
+        self.assertLessEqual(max(loads) - min(loads), max(self.sizes.values()))
+
+    def test_more_shards_than_pages(self):
+        self.assertEqual(partition({"a.md": 5}, 3), [["a.md"], [], []])
+
+
+class TestCheckShards(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sources = ["a.md", "b.md", "c.md"]
+        self.manifests = {}
+        for index, sources in enumerate((["a.md", "c.md"], ["b.md"]), 1):
+            pages = {}
+            for source in sources:
+                output = self.write(os.path.join(f"shard-{index}", source[:-3] + ".html"), source)
+                pages[source] = {"output": output}
+            self.manifests[index] = {"template": "t", "basepath": "/", "pages": pages, "shard": shard_record(index, 2, sources, self.sources)}
+
+    def test_complete_shards(self):
+        self.assertEqual(check_shards(self.manifests, 2, self.sources), [])
+
+    def test_missing_shard(self):
+        self.manifests[2] = None
+        self.assertEqual(check_shards(self.manifests, 2, self.sources), ["shard 2/2 has not been built"])
+
+    def test_site_changed_since_shards_were_built(self):
+        problems = check_shards(self.manifests, 2, self.sources + ["d.md"])
+        self.assertEqual(problems[-1], "d.md is in no shard")
+        self.assertIn("shard 1/2 was built from a different set of pages", problems)
+
+    def test_failed_and_missing_pages(self):
+        del self.manifests[1]["pages"]["a.md"]
+        os.remove(self.manifests[2]["pages"]["b.md"]["output"])
+        problems = check_shards(self.manifests, 2, self.sources)
+        self.assertEqual(problems[0], "a.md failed to build in shard 1/2")
+        self.assertTrue(problems[1].startswith("b.md is missing from shard 2/2"))
+
+    def test_overlap_and_settings(self):
+        self.manifests[2]["shard"]["pages"].append("a.md")
+        self.manifests[2]["basepath"] = "/site/"
+        self.assertEqual(check_shards(self.manifests, 2, self.sources), [
+            "a.md is in shards 1 and 2",
+            "shards were built with different templates, basepaths or options",
+        ])
+
+    def test_link_outputs(self):
+        dest = os.path.join(self.root, "docs")
+        placed = set()
+        self.assertEqual(link_outputs(os.path.join(self.root, "shard-1"), dest, placed), 2)
+        self.assertEqual(placed, {"a.html", "c.html"})
+        self.assertTrue(os.path.samefile(os.path.join(dest, "a.html"), self.manifests[1]["pages"]["a.md"]["output"]))
+        self.assertEqual(link_outputs(os.path.join(self.root, "shard-1"), dest, set()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
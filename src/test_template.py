@@ -0,0 +1,115 @@
+import io
+import unittest
+from unittest import mock
+from htmlnode import url_resolver
+from template import Template, compile_template, load_template, minify_html, rewrite_urls
+from tempdir import TempDirTestCase
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_segments_and_slots(self):
+        template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.segments, ("<title>", "</title><main>", "</main>"))
+        self.assertEqual(template.slots, ("Title", "Content"))
+
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        html = template.render({"Title": "Hello", "Content": "<p>Hi</p>"})
+        self.assertEqual(html, "<title>Hello</title><p>Hi</p>")
+
+    def test_render_repeated_slot(self):
+        template = compile_template("{{ Title }}|{{ Content }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "T", "Content": "C"}), "T|C|T")
+
+    def test_basepath_applied_at_compile_time(self):
+        template = compile_template('<link href="/index.css"><img src="/a.png">{{ Title }}{{ Content }}', "/site/")
+        self.assertEqual(template.segments[0], '<link href="/site/index.css"><img src="/site/a.png">')
+
+    def test_asset_map_applied_at_compile_time(self):
+        assets = (("/index.css", "/index.abc123.css"),)
+        template = compile_template('<link href="/index.css"><a href="/x">{{ Title }}{{ Content }}', "/site/", assets=assets)
+        self.assertEqual(template.segments[0], '<link href="/site/index.abc123.css"><a href="/site/x">')
+
+    def test_write_streams_callable_slots(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}|{{ Content }}")
+        stream = io.StringIO()
+        template.write(stream, {"Title": "T", "Content": lambda: iter(["<p>", "x", "</p>"])})
+        self.assertEqual(stream.getvalue(), "<title>T</title><p>x</p>|<p>x</p>")
+
+    def test_missing_slot(self):
+        with self.assertRaises(ValueError):
+            compile_template("<title>{{ Title }}</title>")
+
+    def test_unknown_slot(self):
+        with self.assertRaises(ValueError):
+            compile_template("{{ Title }}{{ Content }}{{ Author }}")
+
+    def test_segment_count_checked(self):
+        with self.assertRaises(ValueError):
+            Template(("a",), ("Title",))
+
+
+class TestMinifyTemplate(unittest.TestCase):
+    def test_indentation_between_blocks_dropped(self):
+        html = "<html>\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>")
+
+    def test_inline_whitespace_kept_as_one_space(self):
+        self.assertEqual(minify_html("<p>a  <b>x</b>\n  <i>y</i></p>"), "<p>a <b>x</b> <i>y</i></p>")
+
+    def test_preformatted_kept_exact(self):
+        html = "<div>\n<pre>  a\n\n  b</pre>\n<code>x  y</code>  z\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre>  a\n\n  b</pre><code>x  y</code> z</div>")
+
+    def test_minified_once_at_compile_time(self):
+        template = compile_template("<body>\n  <main>{{ Title }}</main>\n  {{ Content }}\n</body>\n", minify=True)
+        self.assertEqual(template.segments, ("<body><main>", "</main>", "</body>"))
+
+
+class TestRewriteUrls(unittest.TestCase):
+    def test_root_basepath_unchanged(self):
+        html = '<a href="/x">x</a>'
+        self.assertIs(rewrite_urls(html, url_resolver("/")), html)
+
+    def test_protocol_relative_untouched(self):
+        html = '<script src="//cdn.example.com/a.js"></script>'
+        self.assertEqual(rewrite_urls(html, url_resolver("/site/")), html)
+
+    def test_rewrites_href_and_src(self):
+        html = '<a href="/x"><img src="/y.png"></a><a href="https://e.com">e</a>'
+        self.assertEqual(
+            rewrite_urls(html, url_resolver("/site/")),
+            '<a href="/site/x"><img src="/site/y.png"></a><a href="https://e.com">e</a>',
+        )
+
+
+class TestLoadTemplate(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+
+    def test_template_read_once(self):
+        first = load_template(self.path)
+        with mock.patch("builtins.open") as opened:
+            second = load_template(self.path)
+        opened.assert_not_called()
+        self.assertIs(first, second)
+
+    def test_template_recompiled_after_change(self):
+        first = load_template(self.path)
+        self.write("template.html", "<h1>{{ Title }}</h1>\n{{ Content }}")
+        self.assertIsNot(first, load_template(self.path))
+
+    def test_separate_compile_per_basepath(self):
+        self.assertIsNot(load_template(self.path, "/"), load_template(self.path, "/site/"))
+
+    def test_separate_compile_when_minified(self):
+        self.assertIsNot(load_template(self.path), load_template(self.path, minify=True))
+
+    def test_separate_compile_per_asset_map(self):
+        assets = (("/index.css", "/index.abc.css"),)
+        self.assertIsNot(load_template(self.path, "/"), load_template(self.path, "/", assets))
+
+
+if __name__ == "__main__":
+    unittest.main()
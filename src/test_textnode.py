@@ -1,5 +1,6 @@
+import time
 import unittest
-from textnode import TextNode, TextType, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, BlockType, block_to_block_type, markdown_to_html_node
+from textnode import TextNode, TextType, scan_blocks, tokenize_inline, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, BlockType, block_to_block_type, markdown_to_html_node
 
 class TestTextNode(unittest.TestCase):
     def test_eq(self):
@@ -27,6 +28,9 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Click here", TextType.LINK, url="https://example.com")
         self.assertEqual(node, node2)
 
+    def test_text_node_has_no_instance_dict(self):
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), "__dict__"))
+
     def test_split_nodes_delimiter_code(self):
         node = TextNode("This is text with a `code block` word", TextType.TEXT)
         new_nodes = split_nodes_delimiter([node], "`", TextType.CODE)
@@ -390,6 +394,137 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+
+def legacy_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+class TestTokenizeInline(unittest.TestCase):
+    def test_matches_legacy_pipeline(self):
+        samples = [
+            "",
+            "plain",
+            "This is **text** with an _italic_ word and a `code block`",
+            "an ![image](https://i.imgur.com/x.png) and a [link](https://boot.dev)",
+            "![a](b)[c](d)**e**_f_`g`",
+            "!![img](u) and ![broken](u and [x] (y)",
+            "***bold*** and ****",
+            "[outer [inner](u)](v)",
+        ]
+        for text in samples:
+            self.assertEqual(tokenize_inline(text), legacy_text_to_textnodes(text), text)
+
+    def test_unmatched_delimiter(self):
+        for text in ["a **b", "a _b", "a `b"]:
+            with self.assertRaises(ValueError):
+                tokenize_inline(text)
+
+    def test_delimiters_inside_code_are_literal(self):
+        self.assertEqual(
+            tokenize_inline("run `a**b_c` now"),
+            [TextNode("run ", TextType.TEXT), TextNode("a**b_c", TextType.CODE), TextNode(" now", TextType.TEXT)],
+        )
+
+    def test_underscore_inside_link_url(self):
+        self.assertEqual(
+            tokenize_inline("[docs](https://e.com/a_b)"),
+            [TextNode("docs", TextType.LINK, "https://e.com/a_b")],
+        )
+
+    def test_image_not_treated_as_link(self):
+        self.assertEqual(
+            tokenize_inline("![alt](/a.png)"),
+            [TextNode("alt", TextType.IMAGE, "/a.png")],
+        )
+
+
+class TestTokenizeInlinePathological(unittest.TestCase):
+    def test_thousands_of_links(self):
+        count = 5000
+        text = "".join(f"see [l{i}](/p/{i}) " for i in range(count))
+        nodes = tokenize_inline(text)
+        links = [node for node in nodes if node.text_type == TextType.LINK]
+        self.assertEqual(len(links), count)
+        self.assertEqual(links[-1], TextNode(f"l{count - 1}", TextType.LINK, f"/p/{count - 1}"))
+        self.assertEqual(nodes, legacy_text_to_textnodes(text))
+
+    def test_thousands_of_delimiters(self):
+        count = 5000
+        text = "".join(f"**b{i}** _i{i}_ `c{i}` " for i in range(count))
+        nodes = tokenize_inline(text)
+        self.assertEqual(len(nodes), count * 6)
+        self.assertEqual(nodes, legacy_text_to_textnodes(text))
+
+    def test_unclosed_brackets(self):
+        for text in ["[" * 100000, "[a](" * 25000, "![a](" * 25000, "[a]" * 30000, "(]" * 50000]:
+            nodes = tokenize_inline(text)
+            self.assertEqual(nodes, [TextNode(text, TextType.TEXT)])
+
+    def test_faster_than_legacy_on_link_heavy_paragraph(self):
+        # The old image/link passes re-split the remaining text once per match,
+        # which is quadratic in the number of links.
+        text = "".join(f"see [link {i}](https://example.com/{i}) and " for i in range(20000))
+        start = time.perf_counter()
+        legacy_text_to_textnodes(text)
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        tokenize_inline(text)
+        new_time = time.perf_counter() - start
+        self.assertLess(new_time, legacy_time)
+
+
+class TestScanBlocks(unittest.TestCase):
+    def test_matches_split_and_classify(self):
+        md = (
+            "# Title\n\nA **paragraph**\nacross lines\n\n\n\n  - one\n- two\n\n> q1\n>q2\n\n"
+            "1. a\n2. b\n\n1. a\n3. b\n\n####### seven\n\n```\ncode\n```\n\ntrailing  \n\n"
+            "- \n\n1. \n\n- a\n- \n\n1. a\n2. \n"
+        )
+        expected = [(block, block_to_block_type(block)) for block in markdown_to_blocks(md)]
+        self.assertEqual(list(scan_blocks(md.split("\n"))), expected)
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\nOutro"
+        self.assertEqual(
+            list(scan_blocks(md.split("\n"))),
+            [
+                ("Intro", BlockType.PARAGRAPH),
+                ("```\nfirst\n\n\nsecond\n```", BlockType.CODE),
+                ("Outro", BlockType.PARAGRAPH),
+            ],
+        )
+        html = markdown_to_html_node(md).to_html()
+        self.assertIn("<pre><code>first\n\n\nsecond\n</code></pre>", html)
+
+    def test_single_line_fence(self):
+        self.assertEqual(list(scan_blocks(["```x = 1```"])), [("```x = 1```", BlockType.CODE)])
+
+    def test_unterminated_fence_is_paragraph(self):
+        self.assertEqual(list(scan_blocks(["```", "code"])), [("```\ncode", BlockType.PARAGRAPH)])
+
+    def test_crlf_lines(self):
+        lines = ["# Title\r\n", "\r\n", "- a\r\n", "- b\r\n"]
+        self.assertEqual(
+            list(scan_blocks(lines)),
+            [("# Title", BlockType.HEADING), ("- a\n- b", BlockType.UNORDERED_LIST)],
+        )
+
+    def test_yields_before_input_is_exhausted(self):
+        def lines():
+            yield "# First"
+            yield ""
+            raise AssertionError("read past the first block")
+
+        blocks = scan_blocks(lines())
+        self.assertEqual(next(blocks), ("# First", BlockType.HEADING))
+
+
 if __name__ == "__main__":
     unittest.main()
 
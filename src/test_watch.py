@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+import unittest
+from watch import diff_snapshots, snapshot, watch
+from tempdir import TempDirTestCase
+
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.write(os.path.join(self.dir, "a.md"), "# A")
+        self.write(self.template, "{{ Title }}{{ Content }}")
+
+    def test_snapshot_files_and_directories(self):
+        state = snapshot([self.dir, self.template])
+        self.assertEqual(sorted(state), sorted([os.path.join(self.dir, "a.md"), self.template]))
+
+    def test_snapshot_missing_path(self):
+        self.assertEqual(snapshot([os.path.join(self.root, "missing")]), {})
+
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), ({"b", "d"}, {"c"}))
+
+    def test_watch_reports_burst_once(self):
+        calls = []
+        done = threading.Event()
+
+        def on_change(changed, removed):
+            calls.append((changed, removed))
+            done.set()
+
+        thread = threading.Thread(
+            target=watch,
+            args=([self.dir, self.template], on_change, 0.05, 0.2, done.is_set),
+        )
+        thread.start()
+        time.sleep(0.15)
+        self.write(os.path.join(self.dir, "b.md"), "# B")
+        time.sleep(0.05)
+        os.remove(os.path.join(self.dir, "a.md"))
+        self.assertTrue(done.wait(5))
+        thread.join(5)
+        self.assertEqual(calls, [({os.path.join(self.dir, "b.md")}, {os.path.join(self.dir, "a.md")})])
+
+
+if __name__ == "__main__":
+    unittest.main()
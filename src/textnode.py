@@ -23,6 +23,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -126,16 +128,51 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
-def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+INLINE_PATTERN = re.compile(
+    r"(\*\*|_|`)"
+    r"|!\[([^\[\]]*)\]\(([^\(\)]*)\)"
+    r"|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
+)
+INLINE_DELIMITERS = {"**": TextType.BOLD, "_": TextType.ITALIC, "`": TextType.CODE}
+
+
+def tokenize_inline(text):
+    # Single left-to-right scan. Delimited spans are taken literally, and a
+    # failed link/image attempt only scans up to the next bracket or paren,
+    # so the whole text is examined in linear time.
+    nodes = []
+    position = 0
+    while True:
+        match = INLINE_PATTERN.search(text, position)
+        if match is None:
+            break
+        start = match.start()
+        if match.lastindex == 1:
+            delimiter = match.group(1)
+            close = text.find(delimiter, match.end())
+            if close == -1:
+                raise ValueError(f"Invalid markdown: unmatched delimiter '{delimiter}' in '{text}'")
+            node = TextNode(text[match.end():close], INLINE_DELIMITERS[delimiter])
+            end = close + len(delimiter)
+        elif match.lastindex == 3:
+            node = TextNode(match.group(2), TextType.IMAGE, match.group(3))
+            end = match.end()
+        else:
+            node = TextNode(match.group(4), TextType.LINK, match.group(5))
+            end = match.end()
+        if start > position:
+            nodes.append(TextNode(text[position:start], TextType.TEXT))
+        nodes.append(node)
+        position = end
+    if position < len(text):
+        nodes.append(TextNode(text[position:], TextType.TEXT))
     return nodes
 
 
+def text_to_textnodes(text):
+    return tokenize_inline(text)
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for node in old_nodes:
@@ -238,21 +275,97 @@ def ol_to_html_node(block):
     return ParentNode("ol", li_nodes)
 
 
+def scan_blocks(lines):
+    # Reads markdown one line at a time (a file object works) and yields
+    # (block, block_type) as soon as each block ends, classifying it as the
+    # lines arrive. Fenced code runs to its closing fence, blank lines included.
+    block_lines = []
+    in_fence = False
+    is_quote = is_unordered = is_ordered = False
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if in_fence:
+            block_lines.append(line)
+            if line.rstrip().endswith('```'):
+                in_fence = False
+                yield '\n'.join(block_lines).strip(), BlockType.CODE
+                block_lines = []
+            continue
+        if not line.strip():
+            if block_lines:
+                yield _finish_block(block_lines, is_quote, is_unordered, is_ordered)
+                block_lines = []
+            continue
+        if not block_lines:
+            first = line.lstrip()
+            if first.startswith('```'):
+                if len(first.rstrip()) >= 6 and first.rstrip().endswith('```'):
+                    yield first.rstrip(), BlockType.CODE
+                else:
+                    block_lines.append(line)
+                    in_fence = True
+                continue
+            is_quote = first.startswith('>')
+            is_unordered = first.startswith('- ')
+            is_ordered = first.startswith('1. ')
+        else:
+            is_quote = is_quote and line.startswith('>')
+            is_unordered = is_unordered and line.startswith('- ')
+            is_ordered = is_ordered and line.startswith(f'{len(block_lines) + 1}. ')
+        block_lines.append(line)
+
+    if block_lines:
+        yield _finish_block(block_lines, is_quote, is_unordered, is_ordered)
+
+
+def block_title(block, block_type):
+    # The one title rule: the first "# " line of a block outside fenced code.
+    if block_type == BlockType.CODE:
+        return None
+    for line in block.split('\n'):
+        if line.startswith('# '):
+            return line[2:].strip()
+    return None
+
+
+def _finish_block(block_lines, is_quote, is_unordered, is_ordered):
+    block = '\n'.join(block_lines).strip()
+    # Stripping can cut the marker's space off the last line ("- " -> "-").
+    last_line = block.rsplit('\n', 1)[-1]
+    is_unordered = is_unordered and last_line.startswith('- ')
+    is_ordered = is_ordered and last_line.startswith(f'{len(block_lines)}. ')
+    if re.match(r'^#{1,6} ', block):
+        return block, BlockType.HEADING
+    if is_quote:
+        return block, BlockType.QUOTE
+    if is_unordered:
+        return block, BlockType.UNORDERED_LIST
+    if is_ordered:
+        return block, BlockType.ORDERED_LIST
+    return block, BlockType.PARAGRAPH
+
+
+def block_to_html_node(block, block_type):
+    if block_type == BlockType.PARAGRAPH:
+        return paragraph_to_html_node(block)
+    if block_type == BlockType.HEADING:
+        return heading_to_html_node(block)
+    if block_type == BlockType.CODE:
+        return code_to_html_node(block)
+    if block_type == BlockType.QUOTE:
+        return quote_to_html_node(block)
+    if block_type == BlockType.UNORDERED_LIST:
+        return ul_to_html_node(block)
+    if block_type == BlockType.ORDERED_LIST:
+        return ol_to_html_node(block)
+    raise ValueError("Unsupported block type.")
+
+
 def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(paragraph_to_html_node(block))
-        elif block_type == BlockType.HEADING:
-            children.append(heading_to_html_node(block))
-        elif block_type == BlockType.CODE:
-            children.append(code_to_html_node(block))
-        elif block_type == BlockType.QUOTE:
-            children.append(quote_to_html_node(block))
-        elif block_type == BlockType.UNORDERED_LIST:
-            children.append(ul_to_html_node(block))
-        elif block_type == BlockType.ORDERED_LIST:
-            children.append(ol_to_html_node(block))
+    return typed_blocks_to_html_node(scan_blocks(markdown.split('\n')))
+
+
+def typed_blocks_to_html_node(typed_blocks):
+    children = [block_to_html_node(block, block_type) for block, block_type in typed_blocks]
     return ParentNode("div", children)
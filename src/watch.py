@@ -0,0 +1,46 @@
+import os
+import time
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            for name in filenames:
+                file_path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def diff_snapshots(old, new):
+    changed = {path for path, version in new.items() if old.get(path) != version}
+    removed = {path for path in old if path not in new}
+    return changed, removed
+
+
+def watch(paths, on_change, interval=0.2, debounce=0.1, stop=None):
+    # Polls with os.stat so it works everywhere without extra dependencies.
+    previous = snapshot(paths)
+    while stop is None or not stop():
+        time.sleep(interval)
+        current = snapshot(paths)
+        if current == previous:
+            continue
+        # Editors and git write several files in a burst; wait for it to settle.
+        while True:
+            time.sleep(debounce)
+            settled = snapshot(paths)
+            if settled == current:
+                break
+            current = settled
+        changed, removed = diff_snapshots(previous, current)
+        previous = current
+        on_change(changed, removed)